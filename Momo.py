@@ -1,58 +1,156 @@
 import streamlit as st
+import streamlit.components.v1 as components
+import atexit
+import base64
+import io
 import random
 import time
 import math
-import hashlib
-import json
 import os
 from datetime import datetime
 
-# File to store user data
+from canvas_render import CanvasRenderer, LRUCache, RENDER_CACHE_SIZE
+from game_engine import MathGame, MemoryGame, PaintGame, ShapeGame
+from gallery_store import GalleryStore
+from leaderboard import BOARDS, LEADERBOARDS_META_KEY, Leaderboards
+from math_problems import ProblemBank
+from math_skill import SkillModel
+from memory_board import CLASSIC_BOARD_SIZE, MEMORY_BOARD_SIZES
+from paint_events import EventLog, seeded_event
+from paint_tools import SYMMETRIES, TOOLS
+from shapes import ShapeRegistry
+from timelapse import write_timelapse
+from passwords import submit_check_password, submit_hash_password
+from user_store import PlayerDirectory, open_user_store
+
+# Files to store user data
 USER_DATA_FILE = "kids_games_users.json"
+USER_DB_FILE = "kids_games_users.db"
+# "sqlite" (default) or "journal" for the JSON file plus append-only journal
+USER_STORE_BACKEND = os.environ.get("KIDS_GAMES_USER_STORE", "sqlite")
+# How long stat updates may wait in memory before being written (0 = write immediately)
+USER_STATS_FLUSH_MS = int(os.environ.get("KIDS_GAMES_STATS_FLUSH_MS", "500"))
+# Saved artworks of every user
+GALLERY_DB_FILE = "kids_games_gallery.db"
+# Low-power mode for players who have not picked one: "auto" follows the
+# device's reduce motion setting, "on" and "off" apply to everyone
+LOW_POWER_DEFAULT = os.environ.get("KIDS_GAMES_LOW_POWER", "auto")
+
+@st.cache_resource
+def get_user_store():
+    """Open the user store once per server process; every session shares it"""
+    return open_user_store(USER_STORE_BACKEND, USER_DB_FILE, USER_DATA_FILE, flush_ms=USER_STATS_FLUSH_MS)
+
+@st.cache_resource
+def get_leaderboards():
+    """Load the leaderboards saved with the user store, building them once if missing"""
+    store = get_user_store()
+    saved = store.get_meta(LEADERBOARDS_META_KEY)
+    if saved is not None:
+        leaderboards = Leaderboards.from_dict(saved)
+    else:
+        leaderboards = Leaderboards.rebuild(store)
+        leaderboards.save(store, force=True)
+    # Registered after the store's own exit hook, so it runs before the store closes
+    atexit.register(leaderboards.save, store, force=True)
+    return leaderboards
+
+@st.cache_resource
+def get_player_directory():
+    """Build the sorted player list once per process; registrations and refresh() add to it"""
+    return PlayerDirectory.from_store(get_user_store())
 
 def load_users_from_file():
-    """Load user data from JSON file"""
+    """Return the shared user store"""
     try:
-        if os.path.exists(USER_DATA_FILE):
-            with open(USER_DATA_FILE, 'r') as f:
-                return json.load(f)
-        return {}
+        return get_user_store()
     except Exception as e:
         st.error(f"Error loading user data: {e}")
-        return {}
+        st.stop()
 
-def save_users_to_file(users_db):
-    """Save user data to JSON file"""
+def save_user_to_file(username, change):
+    """Apply change(user_data) to one user's record in the shared store"""
     try:
-        with open(USER_DATA_FILE, 'w') as f:
-            json.dump(users_db, f, indent=2)
-        return True
+        return users_db.update(username, change)
     except Exception as e:
         st.error(f"Error saving user data: {e}")
-        return False
+        return None
+
+# Sessions keep only their username; user records live in the shared store
+users_db = load_users_from_file()
 
 # Initialize authentication session state
-if 'users_db' not in st.session_state:
-    st.session_state.users_db = load_users_from_file()
 if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False
 if 'current_user' not in st.session_state:
     st.session_state.current_user = None
 if 'auth_mode' not in st.session_state:
     st.session_state.auth_mode = 'login'
+if 'pending_auth' not in st.session_state:
+    st.session_state.pending_auth = None
+if 'feedback' not in st.session_state:
+    st.session_state.feedback = []
+# Rescheduled by whatever this run renders, see schedule_rerun()
+st.session_state.rerun_at = None
 
-def hash_password(password):
-    """Hash password for secure storage"""
-    return hashlib.sha256(password.encode()).hexdigest()
+# ======= TRANSIENT FEEDBACK =======
+# Messages and card reveals expire on a later rerun instead of pausing the script
+FEEDBACK_SECONDS = 2.5
+
+def flash(kind, message, seconds=FEEDBACK_SECONDS, balloons=False):
+    """Queue a success/info/error message to show for a few seconds"""
+    st.session_state.feedback.append({
+        'kind': kind,
+        'message': message,
+        'expires_at': time.time() + seconds,
+        'balloons': balloons
+    })
+
+def show_feedback():
+    """Show queued messages that have not expired yet"""
+    now = time.time()
+    st.session_state.feedback = [item for item in st.session_state.feedback if item['expires_at'] > now]
+    for item in st.session_state.feedback:
+        getattr(st, item['kind'])(item['message'])
+        if item['balloons']:
+            st.balloons()
+            item['balloons'] = False
+        schedule_rerun(item['expires_at'])
+
+def schedule_rerun(at):
+    """Ask for a rerun at time `at`, when something on screen should change"""
+    if st.session_state.rerun_at is None or at < st.session_state.rerun_at:
+        st.session_state.rerun_at = at
+
+@st.fragment(run_every=0.25)
+def rerun_timer():
+    """Rerun the app once the scheduled time passes, without blocking this run"""
+    if st.session_state.rerun_at is not None and time.time() >= st.session_state.rerun_at:
+        st.rerun()
+
+def start_rerun_timer():
+    """Start rerun_timer if this run scheduled a rerun"""
+    if st.session_state.rerun_at is not None:
+        rerun_timer()
 
 def register_user(username, password, display_name):
-    """Register a new user and save to file"""
-    if username in st.session_state.users_db:
+    """Start registering a new user; the password is hashed on the hashing pool"""
+    if username in users_db:
         return False, "Username already exists!"
     
-    st.session_state.users_db[username] = {
-        'password': hash_password(password),
-        'display_name': display_name,
+    future = submit_hash_password(password)
+    if future is None:
+        return False, "Lots of friends are joining right now. Please try again in a moment!"
+    st.session_state.pending_auth = {
+        'action': 'register', 'username': username, 'display_name': display_name, 'future': future
+    }
+    return True, "Creating your account..."
+
+def finish_register(pending):
+    """Save a new user once their password hash is ready"""
+    user_data = {
+        'password': pending['future'].result(),
+        'display_name': pending['display_name'],
         'created_date': datetime.now().isoformat(),
         'last_login': None,
         'total_games_played': 0,
@@ -64,59 +162,143 @@ def register_user(username, password, display_name):
         }
     }
     
-    # Save to file
-    if save_users_to_file(st.session_state.users_db):
-        return True, "Account created successfully!"
-    else:
+    # Save to file; create() fails if another session took the name first
+    try:
+        if not users_db.create(pending['username'], user_data):
+            return False, "Username already exists!"
+    except Exception as e:
+        st.error(f"Error saving user data: {e}")
         return False, "Error saving account data!"
+    get_player_directory().add(pending['username'], pending['display_name'])
+    return True, "Account created successfully!"
 
 def login_user(username, password):
-    """Login user and update last login time"""
-    if username not in st.session_state.users_db:
+    """Start checking a login; the password is verified on the hashing pool"""
+    user_data = users_db.get(username)
+    if user_data is None:
         return False, "Username not found!"
     
-    if st.session_state.users_db[username]['password'] != hash_password(password):
+    future = submit_check_password(username, password, user_data['password'])
+    if future is None:
+        return False, "Lots of friends are logging in right now. Please try again in a moment!"
+    st.session_state.pending_auth = {'action': 'login', 'username': username, 'future': future}
+    return True, "Checking your password..."
+
+def finish_login(pending):
+    """Log the user in once their password check is done"""
+    matches, new_hash = pending['future'].result()
+    if not matches:
         return False, "Incorrect password!"
-    
-    # Update last login time
-    st.session_state.users_db[username]['last_login'] = datetime.now().isoformat()
-    save_users_to_file(st.session_state.users_db)
+    username = pending['username']
+    
+    # Update last login time, upgrading an outdated password hash on the way
+    def record_login(user_data):
+        user_data['last_login'] = datetime.now().isoformat()
+        if new_hash:
+            user_data['password'] = new_hash
+    user_data = save_user_to_file(username, record_login)
+    if user_data is None:
+        return False, "Username not found!"
     
     st.session_state.logged_in = True
     st.session_state.current_user = username
-    st.session_state.player_name = st.session_state.users_db[username]['display_name']
+    st.session_state.player_name = user_data['display_name']
     return True, "Login successful!"
 
-def update_user_game_stats(game_type, stats_update):
-    """Update and save user game statistics"""
-    if st.session_state.current_user and st.session_state.current_user in st.session_state.users_db:
-        user_data = st.session_state.users_db[st.session_state.current_user]
-        
-        # Update total games
+@st.fragment(run_every=0.25)
+def show_pending_auth():
+    """Poll the password check so reruns never wait on hashing"""
+    pending = st.session_state.pending_auth
+    # The fragment can tick once more before the full rerun removes it
+    if pending is None:
+        return
+    if not pending['future'].done():
+        st.info("🔐 Checking your password...")
+        return
+    
+    st.session_state.pending_auth = None
+    if pending['action'] == 'login':
+        success, message = finish_login(pending)
+        if success:
+            flash('success', f"🎉 {message}")
+        else:
+            flash('error', f"❌ {message}")
+    else:
+        success, message = finish_register(pending)
+        if success:
+            flash('success', f"🎉 {message}", balloons=True)
+            flash('info', "🚀 Now you can login with your new account!")
+            st.session_state.auth_mode = 'login'
+        else:
+            flash('error', f"❌ {message}")
+    # A full rerun, so the fragment leaves the page with nothing left to poll
+    st.rerun()
+
+def apply_game_stats(user_data, game_type, stats_update, count_game=True):
+    """Merge a game's stats update into a user record
+
+    best_* values replace the stored best when they beat it; every other stat
+    is a counter and the update is added to it.  A dict in the update is a
+    group of stats kept under its name (like one memory board size), started
+    from the update the first time it is seen.
+    """
+    # Update total games
+    if count_game:
         user_data['total_games_played'] += 1
-        
-        # Update specific game stats
-        if game_type in user_data['game_stats']:
-            for stat, value in stats_update.items():
-                if stat in user_data['game_stats'][game_type]:
-                    if stat.startswith('best_'):
-                        current_best = user_data['game_stats'][game_type][stat]
-                        if current_best is None:
-                            user_data['game_stats'][game_type][stat] = value
-                        elif stat in ['best_moves', 'best_time'] and value < current_best:
-                            user_data['game_stats'][game_type][stat] = value
-                        elif stat == 'best_streak' and value > current_best:
-                            user_data['game_stats'][game_type][stat] = value
-                    else:
-                        user_data['game_stats'][game_type][stat] = value
-        
-        # Save updated stats to file
-        save_users_to_file(st.session_state.users_db)
+    
+    # Update specific game stats
+    if game_type in user_data['game_stats']:
+        merge_stats(user_data['game_stats'][game_type], stats_update)
+
+def merge_stats(stats, stats_update, add_missing=False):
+    """Merge stats_update into stats as apply_game_stats describes"""
+    for stat, value in stats_update.items():
+        if isinstance(value, dict):
+            merge_stats(stats.setdefault(stat, {}), value, add_missing=True)
+        elif stat not in stats:
+            if add_missing:
+                stats[stat] = value
+        elif stat.startswith('best_'):
+            current_best = stats[stat]
+            if current_best is None:
+                stats[stat] = value
+            elif stat in ['best_moves', 'best_time'] and value < current_best:
+                stats[stat] = value
+            elif stat == 'best_streak' and value > current_best:
+                stats[stat] = value
+        else:
+            stats[stat] += value
+
+def update_user_game_stats(game_type, stats_update, count_game=True, change=None):
+    """Update and save user game statistics and the leaderboards
+
+    change(user_data), if given, is applied in the same update, for stored
+    game state that is not a counter or a best.  Returns the saved record,
+    or None if nothing was saved.
+    """
+    if st.session_state.current_user:
+        def apply(user_data):
+            apply_game_stats(user_data, game_type, stats_update, count_game)
+            if change is not None:
+                change(user_data)
+        # Merge against the latest stored record, not a copy read earlier
+        user_data = save_user_to_file(st.session_state.current_user, apply)
+        if user_data is not None:
+            leaderboards = get_leaderboards()
+            leaderboards.offer_record(st.session_state.current_user, user_data)
+            # Changed entries are merged into the stored boards every SAVE_SECONDS
+            try:
+                leaderboards.save(users_db)
+            except Exception:
+                # They stay queued and go with the next save
+                pass
+        return user_data
+    return None
 
 def show_user_stats():
     """Display user statistics"""
     if st.session_state.current_user:
-        user_data = st.session_state.users_db[st.session_state.current_user]
+        user_data = users_db.get(st.session_state.current_user)
         
         with st.expander(f"📊 {user_data['display_name']}'s Stats"):
             col1, col2, col3 = st.columns(3)
@@ -151,6 +333,47 @@ def show_user_stats():
                 last_login = datetime.fromisoformat(user_data['last_login']).strftime("%Y-%m-%d %H:%M")
                 st.info(f"Last login: {last_login}")
 
+def show_page_controls(state_key, pages, key_prefix):
+    """Previous / "Page x of y" / Next buttons moving the page number in st.session_state[state_key]"""
+    if pages <= 1:
+        return
+    page = st.session_state[state_key]
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("⬅️ Previous", key=f"{key_prefix}_prev", disabled=page == 0):
+            st.session_state[state_key] = page - 1
+            st.rerun()
+    with col2:
+        st.markdown(f"Page {page + 1} of {pages}")
+    with col3:
+        if st.button("Next ➡️", key=f"{key_prefix}_next", disabled=page >= pages - 1):
+            st.session_state[state_key] = page + 1
+            st.rerun()
+
+# Players listed per page in the registered users list
+DIRECTORY_PAGE_SIZE = 10
+
+def show_player_directory(directory):
+    """Show one page of registered players, filtered by a username prefix"""
+    if 'directory_page' not in st.session_state:
+        st.session_state.directory_page = 0
+    
+    def reset_page():
+        st.session_state.directory_page = 0
+    search = st.text_input("🔎 Find a player", key="directory_search", on_change=reset_page,
+                           placeholder="Type the start of a username...")
+    
+    players, matches = directory.search(search.strip(), st.session_state.directory_page, DIRECTORY_PAGE_SIZE)
+    if not matches:
+        st.write("No players found with that name.")
+        return
+    for username, display_name in players:
+        st.write(f"👤 **{username}** - {display_name}")
+    
+    # Page controls
+    pages = (matches + DIRECTORY_PAGE_SIZE - 1) // DIRECTORY_PAGE_SIZE
+    show_page_controls('directory_page', pages, 'directory')
+
 def show_auth_screen():
     """Show authentication screen"""
     st.markdown("""
@@ -160,9 +383,14 @@ def show_auth_screen():
     </div>
     """, unsafe_allow_html=True)
     
+    show_feedback()
+    
     # Show existing users count
-    if st.session_state.users_db:
-        st.info(f"📊 {len(st.session_state.users_db)} players have joined our games!")
+    directory = get_player_directory()
+    # Picks up players registered through other server processes
+    directory.refresh(users_db)
+    if len(directory):
+        st.info(f"📊 {len(directory)} players have joined our games!")
     
     # Toggle between login and register
     col1, col2 = st.columns(2)
@@ -184,20 +412,15 @@ def show_auth_screen():
             if st.form_submit_button("🚀 Login", use_container_width=True):
                 if username and password:
                     success, message = login_user(username, password)
-                    if success:
-                        st.success(f"🎉 {message}")
-                        time.sleep(1)
-                        st.rerun()
-                    else:
+                    if not success:
                         st.error(f"❌ {message}")
                 else:
                     st.warning("⚠️ Please enter both username and password!")
         
         # Show hint for demo
-        if st.session_state.users_db:
+        if len(directory):
             with st.expander("🔍 Registered Users (for testing)"):
-                for username, data in st.session_state.users_db.items():
-                    st.write(f"👤 **{username}** - {data['display_name']}")
+                show_player_directory(directory)
     
     else:  # register mode
         st.markdown("### 📝 Create New Account")
@@ -220,23 +443,52 @@ def show_auth_screen():
                         st.error("❌ Username must be at least 3 characters long!")
                     else:
                         success, message = register_user(username, password, display_name)
-                        if success:
-                            st.success(f"🎉 {message}")
-                            st.info("🚀 Now you can login with your new account!")
-                            st.balloons()
-                            time.sleep(2)
-                            st.session_state.auth_mode = 'login'
-                            st.rerun()
-                        else:
+                        if not success:
                             st.error(f"❌ {message}")
                 else:
                     st.warning("⚠️ Please fill in all fields!")
+    
+    # Finish a login or registration once its password hashing is done
+    if st.session_state.pending_auth:
+        show_pending_auth()
+    start_rerun_timer()
 
 # Check if user is logged in before showing the main app
 if not st.session_state.logged_in:
     show_auth_screen()
     st.stop()  # Stop execution here if not logged in
 
+# ======= LOW-POWER MODE =======
+# Stylesheets are served from static/ (see .streamlit/config.toml), so the
+# browser downloads them once and each rerun only sends the links
+STYLESHEET_URL = "app/static/kids_games.css"
+LOW_POWER_STYLESHEET_URL = "app/static/low_power.css"
+LOW_POWER_MODES = {'auto': "Auto", 'on': "On", 'off': "Off"}
+
+def low_power_mode():
+    """The current player's low-power mode: 'on', 'off' or 'auto'
+
+    'auto' turns it on only for devices set to reduce motion.  Players who
+    never picked a mode get the server default.
+    """
+    user_data = users_db.get(st.session_state.current_user)
+    return (user_data or {}).get('low_power', LOW_POWER_DEFAULT)
+
+def save_low_power_mode():
+    """Remember the low-power mode the player picked"""
+    mode = st.session_state.low_power_choice
+    save_user_to_file(st.session_state.current_user, lambda user_data: user_data.update(low_power=mode))
+
+def stylesheet_links(low_power):
+    """HTML linking the stylesheets, the low-power one only where it applies"""
+    links = f'<link rel="stylesheet" href="{STYLESHEET_URL}">'
+    if low_power != 'off':
+        media = 'all' if low_power == 'on' else '(prefers-reduced-motion: reduce)'
+        links += f'<link rel="stylesheet" href="{LOW_POWER_STYLESHEET_URL}" media="{media}">'
+    return links
+
+low_power = low_power_mode()
+
 # Add user info and logout to sidebar when logged in
 with st.sidebar:
     st.markdown(f"### 👋 Welcome back!")
@@ -245,6 +497,11 @@ with st.sidebar:
     # Show user stats
     show_user_stats()
     
+    st.radio("🔋 Low-power mode", list(LOW_POWER_MODES), index=list(LOW_POWER_MODES).index(low_power),
+             format_func=LOW_POWER_MODES.get, key="low_power_choice", on_change=save_low_power_mode,
+             horizontal=True, help="Stops the moving colors and sparkles to save battery. "
+                                   "Auto does this when the device is set to reduce motion.")
+    
     st.markdown("---")
     if st.button("🚪 Logout", use_container_width=True):
         st.session_state.logged_in = False
@@ -268,296 +525,8 @@ st.set_page_config(
     layout="wide"
 )
 
-# Custom CSS for kid-friendly styling
-st.markdown("""
-<style>
-    /* Global body styling */
-    .stApp {
-        background: linear-gradient(45deg, #FFB6C1, #87CEEB, #98FB98, #F0E68C, #DDA0DD, #FFE4B5);
-        background-size: 400% 400%;
-        animation: gradientShift 8s ease infinite;
-        min-height: 100vh;
-    }
-    
-    @keyframes gradientShift {
-        0% { background-position: 0% 50%; }
-        25% { background-position: 100% 50%; }
-        50% { background-position: 100% 100%; }
-        75% { background-position: 0% 100%; }
-        100% { background-position: 0% 50%; }
-    }
-    
-    /* Floating elements animation */
-    .floating-elements {
-        position: fixed;
-        top: 0;
-        left: 0;
-        width: 100%;
-        height: 100%;
-        pointer-events: none;
-        z-index: -1;
-    }
-    
-    .floating-star {
-        position: absolute;
-        font-size: 30px;
-        animation: float 6s ease-in-out infinite;
-        opacity: 0.7;
-    }
-    
-    @keyframes float {
-        0%, 100% { transform: translateY(0px) rotate(0deg); }
-        50% { transform: translateY(-20px) rotate(180deg); }
-    }
-    
-    /* Main header styling */
-    .main-header {
-        background: linear-gradient(135deg, #FF69B4, #FF1493, #FF6347, #FFD700, #ADFF2F, #00CED1, #FF69B4);
-        background-size: 400% 400%;
-        animation: rainbowPulse 4s ease-in-out infinite;
-        padding: 3rem;
-        border-radius: 30px;
-        text-align: center;
-        margin-bottom: 3rem;
-        box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-        border: 5px solid #FFF;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .main-header::before {
-        content: "⭐🌈⭐🎈⭐🌈⭐🎈⭐🌈⭐🎈⭐🌈⭐🎈⭐🌈⭐🎈⭐🌈⭐🎈";
-        position: absolute;
-        top: 10px;
-        left: 0;
-        right: 0;
-        font-size: 20px;
-        animation: sparkleMove 3s linear infinite;
-        white-space: nowrap;
-    }
-    
-    @keyframes rainbowPulse {
-        0%, 100% { 
-            background-position: 0% 50%;
-            transform: scale(1);
-        }
-        25% { 
-            background-position: 100% 50%;
-            transform: scale(1.02);
-        }
-        50% { 
-            background-position: 100% 100%;
-            transform: scale(1);
-        }
-        75% { 
-            background-position: 0% 100%;
-            transform: scale(1.02);
-        }
-    }
-    
-    @keyframes sparkleMove {
-        0% { transform: translateX(-100%); }
-        100% { transform: translateX(100%); }
-    }
-    
-    .main-header h1 {
-        font-size: 3.5rem !important;
-        color: white;
-        text-shadow: 3px 3px 6px rgba(0,0,0,0.3);
-        margin: 1rem 0 !important;
-        animation: bounce 2s ease-in-out infinite;
-    }
-    
-    .main-header h3 {
-        font-size: 1.8rem !important;
-        color: #FFF;
-        text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
-        margin-top: 1rem !important;
-    }
-    
-    @keyframes bounce {
-        0%, 20%, 50%, 80%, 100% { transform: translateY(0); }
-        40% { transform: translateY(-10px); }
-        60% { transform: translateY(-5px); }
-    }
-    
-    /* Game cards styling */
-    .game-card {
-        background: linear-gradient(145deg, #FF69B4, #FF1493, #FFD700, #32CD32, #00CED1);
-        background-size: 300% 300%;
-        animation: cardPulse 5s ease-in-out infinite;
-        padding: 2.5rem;
-        border-radius: 25px;
-        text-align: center;
-        color: white;
-        margin: 1.5rem 0;
-        box-shadow: 0 15px 35px rgba(0,0,0,0.2);
-        border: 4px solid #FFF;
-        transform: scale(1);
-        transition: all 0.3s ease;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .game-card::before {
-        content: "✨";
-        position: absolute;
-        top: 10px;
-        right: 10px;
-        font-size: 25px;
-        animation: twinkle 2s ease-in-out infinite;
-    }
-    
-    @keyframes cardPulse {
-        0%, 100% { 
-            background-position: 0% 50%;
-            box-shadow: 0 15px 35px rgba(0,0,0,0.2);
-        }
-        50% { 
-            background-position: 100% 50%;
-            box-shadow: 0 20px 40px rgba(0,0,0,0.3);
-        }
-    }
-    
-    @keyframes twinkle {
-        0%, 100% { opacity: 1; transform: scale(1) rotate(0deg); }
-        50% { opacity: 0.5; transform: scale(1.2) rotate(180deg); }
-    }
-    
-    .game-card:hover {
-        transform: scale(1.05) rotate(1deg);
-        box-shadow: 0 25px 50px rgba(0,0,0,0.3);
-    }
-    
-    .game-card h2 {
-        font-size: 2rem !important;
-        margin-bottom: 1rem !important;
-        text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
-    }
-    
-    .game-card h3 {
-        font-size: 2.5rem !important;
-        margin: 1rem 0 !important;
-        animation: wiggle 3s ease-in-out infinite;
-    }
-    
-    @keyframes wiggle {
-        0%, 100% { transform: rotate(0deg); }
-        25% { transform: rotate(5deg); }
-        75% { transform: rotate(-5deg); }
-    }
-    
-    /* Button styling */
-    .stButton > button {
-        background: linear-gradient(45deg, #FF69B4, #FFD700, #32CD32, #00CED1) !important;
-        background-size: 300% 300% !important;
-        animation: buttonShine 3s ease-in-out infinite !important;
-        color: white !important;
-        border: 3px solid #FFF !important;
-        border-radius: 25px !important;
-        padding: 1rem 2.5rem !important;
-        font-size: 1.2rem !important;
-        font-weight: bold !important;
-        text-shadow: 1px 1px 2px rgba(0,0,0,0.3) !important;
-        transition: all 0.3s ease !important;
-        box-shadow: 0 8px 16px rgba(0,0,0,0.2) !important;
-    }
-    
-    @keyframes buttonShine {
-        0%, 100% { background-position: 0% 50%; }
-        50% { background-position: 100% 50%; }
-    }
-    
-    .stButton > button:hover {
-        transform: scale(1.1) !important;
-        box-shadow: 0 12px 24px rgba(0,0,0,0.3) !important;
-        border-color: #FFD700 !important;
-    }
-    
-    /* Input styling */
-    .stTextInput > div > div > input {
-        border: 3px solid #FF69B4 !important;
-        border-radius: 15px !important;
-        padding: 15px !important;
-        font-size: 1.2rem !important;
-        background: rgba(255,255,255,0.9) !important;
-        box-shadow: 0 5px 15px rgba(0,0,0,0.1) !important;
-    }
-    
-    .stTextInput > div > div > input:focus {
-        border-color: #FFD700 !important;
-        box-shadow: 0 8px 20px rgba(255,215,0,0.3) !important;
-    }
-    
-    /* Metrics styling */
-    .metric-container div {
-        background: linear-gradient(135deg, #FFB6C1, #87CEEB) !important;
-        border-radius: 15px !important;
-        padding: 10px !important;
-        box-shadow: 0 5px 15px rgba(0,0,0,0.1) !important;
-        border: 2px solid #FFF !important;
-    }
-    
-    /* Paint canvas styling */
-    .paint-canvas-container {
-        background: white;
-        padding: 25px;
-        border-radius: 20px;
-        border: 5px solid #FF69B4;
-        text-align: center;
-        overflow: auto;
-        box-shadow: 0 10px 25px rgba(0,0,0,0.2);
-        animation: canvasPulse 4s ease-in-out infinite;
-    }
-    
-    @keyframes canvasPulse {
-        0%, 100% { border-color: #FF69B4; }
-        25% { border-color: #FFD700; }
-        50% { border-color: #32CD32; }
-        75% { border-color: #00CED1; }
-    }
-    
-    /* Happy decorative elements */
-    .happy-decoration {
-        position: fixed;
-        font-size: 40px;
-        animation: happyFloat 8s ease-in-out infinite;
-        pointer-events: none;
-        z-index: 1000;
-    }
-    
-    @keyframes happyFloat {
-        0%, 100% { 
-            transform: translateY(0px) rotate(0deg);
-            opacity: 0.8;
-        }
-        25% { 
-            transform: translateY(-30px) rotate(90deg);
-            opacity: 1;
-        }
-        50% { 
-            transform: translateY(-20px) rotate(180deg);
-            opacity: 0.6;
-        }
-        75% { 
-            transform: translateY(-35px) rotate(270deg);
-            opacity: 1;
-        }
-    }
-    
-    /* Page title styling */
-    h1, h2, h3 {
-        text-shadow: 2px 2px 4px rgba(0,0,0,0.1) !important;
-    }
-    
-    /* Success/Info messages styling */
-    .stSuccess, .stInfo {
-        border-radius: 15px !important;
-        border: 3px solid #32CD32 !important;
-        box-shadow: 0 5px 15px rgba(0,0,0,0.1) !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Kid-friendly styling, without the looping animations in low-power mode
+st.markdown(stylesheet_links(low_power), unsafe_allow_html=True)
 
 # Initialize session state
 if 'current_game' not in st.session_state:
@@ -565,6 +534,40 @@ if 'current_game' not in st.session_state:
 if 'player_name' not in st.session_state:
     st.session_state.player_name = ''
 
+# How many players each leaderboard shows
+LEADERBOARD_SIZE = 5
+
+def show_leaderboards():
+    """Display the top players of every game"""
+    leaderboards = get_leaderboards()
+    # Picks up scores saved by other server processes every SAVE_SECONDS
+    try:
+        leaderboards.save(users_db)
+    except Exception:
+        pass
+    st.markdown("---")
+    st.markdown("### 🏆 Leaderboards")
+    tabs = st.tabs(["🧩 Memory", "🔢 Math", "📐 Shapes", "🎨 Paint"])
+    for tab, game in zip(tabs, ['memory', 'math', 'shapes', 'paint']):
+        with tab:
+            names = [name for name, spec in BOARDS.items() if spec[0] == game]
+            columns = st.columns(len(names))
+            for column, name in zip(columns, names):
+                with column:
+                    stat, title = BOARDS[name][1], BOARDS[name][3]
+                    st.markdown(f"**{title}**")
+                    entries = leaderboards.top(name, LEADERBOARD_SIZE)
+                    if not entries:
+                        st.write("No scores yet - be the first! 🌟")
+                    for rank, (username, display_name, value) in enumerate(entries, 1):
+                        medal = {1: "🥇", 2: "🥈", 3: "🥉"}.get(rank, f"{rank}.")
+                        if stat == 'accuracy':
+                            value = f"{value:.1f}%"
+                        elif stat == 'best_time':
+                            value = f"{value}s"
+                        you = " ⭐" if username == st.session_state.current_user else ""
+                        st.write(f"{medal} **{display_name}** - {value}{you}")
+
 def show_main_menu():
     """Display the main menu with game selection"""
     st.markdown("""
@@ -639,26 +642,39 @@ def show_main_menu():
                 st.session_state.current_game = 'shapes'
                 initialize_shape_game()
                 st.rerun()
+        
+        show_leaderboards()
 
 # ======= MEMORY GAME FUNCTIONS =======
-def initialize_memory_game():
-    """Initialize the memory matching game"""
-    emojis = ["🐶", "🐱", "🐸", "🦋", "🌟", "🎈", "🍎", "🎯"]
-    cards = emojis * 2
-    random.shuffle(cards)
-    
-    st.session_state.memory_cards = cards
-    st.session_state.memory_revealed = [False] * len(cards)
-    st.session_state.memory_matched = [False] * len(cards)
-    st.session_state.memory_first_card = None
-    st.session_state.memory_second_card = None
-    st.session_state.memory_moves = 0
-    st.session_state.memory_pairs_found = 0
-    st.session_state.memory_game_completed = False
-    st.session_state.memory_start_time = time.time()
+# How long a mismatched pair stays face up
+MEMORY_MISMATCH_SECONDS = 1.0
+# Tallest a memory card gets, and the board height bigger boards shrink to fit
+MEMORY_CARD_PX = 100
+MEMORY_BOARD_PX = 640
+
+# Flips cards in the browser and sends back finished moves (pairs of flips),
+# so a move costs one rerun and a mismatch never waits on the server
+memory_board_component = components.declare_component(
+    "memory_board", path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "memory_board"))
+
+def initialize_memory_game(size=None, seed=None):
+    """Deal a new memory game; the same size and seed deal the same cards"""
+    rows, cols = size or st.session_state.get('memory_board_size', CLASSIC_BOARD_SIZE)
+    if seed is None:
+        seed = random.getrandbits(32)
+    
+    st.session_state.memory_board_size = (rows, cols)
+    st.session_state.memory_game = MemoryGame(rows, cols, seed)
+    # Tells the board a new deal started; moves sent for an old one are ignored
+    st.session_state.memory_deal = random.getrandbits(32)
+    st.session_state.memory_moves_seen = 0
 
 def show_memory_game():
     """Display the memory matching game"""
+    apply_memory_moves()
+    game = st.session_state.memory_game
+    board = game.board
+    
     st.markdown("# 🧩 Memory Match Game")
     st.markdown(f"### Welcome back, {st.session_state.player_name}! Find all the matching pairs!")
     
@@ -667,132 +683,112 @@ def show_memory_game():
         st.session_state.current_game = 'menu'
         st.rerun()
     
+    # Board size; changing it deals a new game
+    def change_board_size():
+        initialize_memory_game(size=st.session_state.memory_size_choice)
+    st.selectbox("📏 Board size", MEMORY_BOARD_SIZES, index=MEMORY_BOARD_SIZES.index((board.rows, board.cols)),
+                 format_func=lambda size: f"{size[0]} x {size[1]} ({size[0] * size[1] // 2} pairs)",
+                 key="memory_size_choice", on_change=change_board_size)
+    
     # Game stats
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("🎯 Moves", st.session_state.memory_moves)
+        st.metric("🎯 Moves", board.moves)
     with col2:
-        st.metric("✅ Pairs Found", st.session_state.memory_pairs_found)
+        st.metric("✅ Pairs Found", board.pairs_found)
     with col3:
-        pairs_remaining = len(st.session_state.memory_cards) // 2 - st.session_state.memory_pairs_found
-        st.metric("📝 Pairs Left", pairs_remaining)
+        st.metric("📝 Pairs Left", len(board.faces) - board.pairs_found)
     with col4:
-        if st.session_state.memory_game_completed:
-            elapsed_time = int(time.time() - st.session_state.memory_start_time)
-            st.metric("⏱️ Time", f"{elapsed_time}s")
+        if board.completed:
+            st.metric("⏱️ Time", f"{game.seconds()}s")
         else:
             st.metric("⏱️ Time", "Playing...")
     
+    best = users_db.get(st.session_state.current_user)['game_stats']['memory'].get('boards', {}).get(board.size_name)
+    if best:
+        st.caption(f"🏅 Your best on {board.size_name}: {best['best_moves']} moves, {best['best_time']}s "
+                   f"· Deal #{board.seed}")
+    else:
+        st.caption(f"Deal #{board.seed}")
+    
     # Game completion
-    if st.session_state.memory_game_completed:
+    if board.completed:
         st.balloons()
         st.success(f"🎉 Amazing job, {st.session_state.player_name}! You found all pairs!")
-        elapsed_time = int(time.time() - st.session_state.memory_start_time)
-        st.info(f"🏆 Completed in {st.session_state.memory_moves} moves and {elapsed_time} seconds!")
+        st.info(f"🏆 Completed in {board.moves} moves and {game.seconds()} seconds!")
         
-        if st.button("🎮 Play Again", key="memory_again"):
-            initialize_memory_game()
-            st.rerun()
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("🎮 Play Again", key="memory_again"):
+                initialize_memory_game()
+                st.rerun()
+        with col2:
+            if st.button("🔁 Same Cards Again", key="memory_same_deal"):
+                initialize_memory_game(seed=board.seed)
+                st.rerun()
     
     # Game grid
-    rows, cols = 4, 4
-    for row in range(rows):
-        columns = st.columns(cols)
-        for col in range(cols):
-            index = row * cols + col
-            with columns[col]:
-                if st.session_state.memory_matched[index]:
-                    st.markdown(f"""
-                    <div style='background-color: #90EE90; border: 2px solid #32CD32; border-radius: 15px; 
-                    text-align: center; padding: 20px; font-size: 40px; height: 100px; 
-                    display: flex; align-items: center; justify-content: center;'>
-                        {st.session_state.memory_cards[index]}
-                    </div>""", unsafe_allow_html=True)
-                elif st.session_state.memory_revealed[index]:
-                    st.markdown(f"""
-                    <div style='background-color: #FFE4B5; border: 2px solid #DEB887; border-radius: 15px; 
-                    text-align: center; padding: 20px; font-size: 40px; height: 100px; 
-                    display: flex; align-items: center; justify-content: center;'>
-                        {st.session_state.memory_cards[index]}
-                    </div>""", unsafe_allow_html=True)
-                else:
-                    if st.button("❓", key=f"card_{index}", use_container_width=True):
-                        handle_memory_card_click(index)
-                        st.rerun()
+    memory_board_component(
+        deal=st.session_state.memory_deal,
+        faces=board.faces,
+        cards=board.cards.tolist(),
+        matched=board.matched_list(),
+        seen=st.session_state.memory_moves_seen,
+        cols=board.cols,
+        card_px=min(MEMORY_CARD_PX, MEMORY_BOARD_PX // board.rows),
+        mismatch_ms=int(MEMORY_MISMATCH_SECONDS * 1000),
+        completed=board.completed,
+        low_power=low_power,
+        key="memory_board_moves",
+        default=None,
+    )
+
+def apply_memory_moves():
+    """Apply the moves the board sent that have not been applied yet
 
-def handle_memory_card_click(index):
-    """Handle memory game card clicks"""
-    if st.session_state.memory_matched[index] or st.session_state.memory_revealed[index]:
+    The board is not trusted: malformed input is dropped, and
+    MemoryGame.play() ignores moves that are not allowed.
+    """
+    sent = st.session_state.get('memory_board_moves')
+    if not isinstance(sent, dict) or type(sent.get('start')) is not int or not isinstance(sent.get('moves'), list):
         return
-    
-    if st.session_state.memory_first_card is None:
-        st.session_state.memory_first_card = index
-        st.session_state.memory_revealed[index] = True
-    elif st.session_state.memory_second_card is None and index != st.session_state.memory_first_card:
-        st.session_state.memory_second_card = index
-        st.session_state.memory_revealed[index] = True
-        check_memory_match()
-
-def check_memory_match():
-    """Check if memory cards match"""
-    if st.session_state.memory_first_card is not None and st.session_state.memory_second_card is not None:
-        idx1, idx2 = st.session_state.memory_first_card, st.session_state.memory_second_card
-        
-        if st.session_state.memory_cards[idx1] == st.session_state.memory_cards[idx2]:
-            st.session_state.memory_matched[idx1] = True
-            st.session_state.memory_matched[idx2] = True
-            st.session_state.memory_pairs_found += 1
-            
-            if st.session_state.memory_pairs_found == len(st.session_state.memory_cards) // 2:
-                st.session_state.memory_game_completed = True
-        else:
-            time.sleep(0.5)
-            st.session_state.memory_revealed[idx1] = False
-            st.session_state.memory_revealed[idx2] = False
-        
-        st.session_state.memory_first_card = None
-        st.session_state.memory_second_card = None
-        st.session_state.memory_moves += 1
+    if sent.get('deal') != st.session_state.memory_deal:
+        return
+    game = st.session_state.memory_game
+    for number, move in enumerate(sent['moves'], sent['start']):
+        if number < st.session_state.memory_moves_seen:
+            continue
+        st.session_state.memory_moves_seen = number + 1
+        if not isinstance(move, list) or len(move) != 2:
+            continue
+        if game.play(*move) and game.board.completed:
+            finish_memory_game(game)
+
+def finish_memory_game(game):
+    """Record a finished game in the player's stats, overall and for its board size"""
+    board = game.board
+    moves = board.moves
+    seconds = game.seconds()
+    stats = {'games_played': 1, 'boards': {board.size_name: {'games_played': 1, 'best_moves': moves, 'best_time': seconds}}}
+    # The overall bests (and so the leaderboards) stay those of the classic board
+    if (board.rows, board.cols) == CLASSIC_BOARD_SIZE:
+        stats.update(best_moves=moves, best_time=seconds)
+    update_user_game_stats('memory', stats)
 
 # ======= MATH GAME FUNCTIONS =======
+@st.cache_resource
+def get_math_problem_bank():
+    """Build every operation's problems once per process; every session draws from them"""
+    return ProblemBank()
+
 def initialize_math_game():
     """Initialize the math game"""
-    st.session_state.math_score = 0
-    st.session_state.math_questions_answered = 0
-    st.session_state.math_level = 1
-    st.session_state.math_streak = 0
-    generate_math_problem()
-
-def generate_math_problem():
-    """Generate a new math problem based on level"""
-    level = st.session_state.math_level
-    
-    if level <= 2:  # Addition and subtraction
-        a = random.randint(1, 10 * level)
-        b = random.randint(1, 10 * level)
-        operation = random.choice(['+', '-'])
-        
-        if operation == '+':
-            st.session_state.math_question = f"{a} + {b}"
-            st.session_state.math_answer = a + b
-        else:
-            if a < b:  # Keep result positive
-                a, b = b, a
-            st.session_state.math_question = f"{a} - {b}"
-            st.session_state.math_answer = a - b
-    
-    else:  # Multiplication and division
-        a = random.randint(1, min(12, level + 5))
-        b = random.randint(1, min(12, level + 5))
-        operation = random.choice(['×', '÷'])
-        
-        if operation == '×':
-            st.session_state.math_question = f"{a} × {b}"
-            st.session_state.math_answer = a * b
-        else:
-            result = a * b  # Make sure division is exact
-            st.session_state.math_question = f"{result} ÷ {a}"
-            st.session_state.math_answer = b
+    # Skill carries over between games; it lives in the player's stats
+    user_data = users_db.get(st.session_state.current_user)
+    skill = SkillModel.from_stats(user_data['game_stats']['math'])
+    # The deck outlives a game, so a new game does not bring old problems straight back
+    previous = st.session_state.get('math_game')
+    st.session_state.math_game = MathGame(get_math_problem_bank(), skill, deck=previous and previous.deck)
 
 def show_math_game():
     """Display the math adventure game"""
@@ -805,20 +801,21 @@ def show_math_game():
         st.rerun()
     
     # Game stats
+    game = st.session_state.math_game
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("⭐ Score", st.session_state.math_score)
+        st.metric("⭐ Score", game.score)
     with col2:
-        st.metric("📚 Questions", st.session_state.math_questions_answered)
+        st.metric("📚 Questions", game.answered)
     with col3:
-        st.metric("🚀 Level", st.session_state.math_level)
+        st.metric("🚀 Level", game.level)
     with col4:
-        st.metric("🔥 Streak", st.session_state.math_streak)
+        st.metric("🔥 Streak", game.streak)
     
     # Current problem
     st.markdown("---")
     st.markdown(f"### 🧮 Solve this problem:")
-    st.markdown(f"# {st.session_state.math_question} = ?")
+    st.markdown(f"# {game.question} = ?")
     
     # Answer input
     user_answer = st.number_input("Your answer:", value=0, step=1, key="math_answer_input")
@@ -831,8 +828,7 @@ def show_math_game():
     
     with col2:
         if st.button("⏭️ Skip Question", key="skip_math", use_container_width=True):
-            st.session_state.math_streak = 0
-            generate_math_problem()
+            game.skip()
             st.rerun()
     
     with col3:
@@ -841,98 +837,60 @@ def show_math_game():
             st.rerun()
     
     # Progress and encouragement
-    if st.session_state.math_questions_answered > 0:
-        accuracy = (st.session_state.math_score / st.session_state.math_questions_answered) * 100
+    if game.answered > 0:
+        accuracy = (game.score / game.answered) * 100
         st.progress(accuracy / 100)
         st.markdown(f"**Accuracy: {accuracy:.1f}%**")
         
-        if st.session_state.math_streak >= 5:
+        if game.streak >= 5:
             st.markdown("🔥 **You're on fire! Amazing streak!**")
-        elif st.session_state.math_streak >= 3:
+        elif game.streak >= 3:
             st.markdown("⭐ **Great job! Keep it up!**")
+    
+    # Drawn once the current problem is on screen
+    game.prefetch()
 
 def check_math_answer(user_answer):
     """Check if the math answer is correct"""
-    correct = user_answer == st.session_state.math_answer
-    st.session_state.math_questions_answered += 1
+    game = st.session_state.math_game
+    operation, difficulty = game.operation, game.difficulty
+    correct = game.check(user_answer)
     
     if correct:
-        st.session_state.math_score += 1
-        st.session_state.math_streak += 1
-        st.success(f"🎉 Correct! {st.session_state.math_question} = {st.session_state.math_answer}")
-        
-        # Level up every 5 correct answers
-        if st.session_state.math_score % 5 == 0:
-            st.session_state.math_level += 1
-            st.balloons()
-            st.info(f"🚀 Level Up! Welcome to Level {st.session_state.math_level}!")
+        flash('success', f"🎉 Correct! {game.question} = {game.answer}")
     else:
-        st.session_state.math_streak = 0
-        st.error(f"❌ Not quite! {st.session_state.math_question} = {st.session_state.math_answer}")
-    
-    time.sleep(1)
-    generate_math_problem()
+        flash('error', f"❌ Not quite! {game.question} = {game.answer}")
+    
+    # Rate the answer against the stored skill, in the same save as the stats
+    def record_skill(user_data):
+        math_stats = user_data['game_stats']['math']
+        model = SkillModel.from_stats(math_stats)
+        model.update(operation, difficulty, correct)
+        math_stats['skill'] = model.to_dict()
+    
+    # A game counts towards total games on its first answer
+    user_data = update_user_game_stats('math', {
+        'questions_answered': 1,
+        'correct_answers': int(correct),
+        'best_streak': game.streak
+    }, count_game=game.answered == 1, change=record_skill)
+    if user_data is not None:
+        game.skill = SkillModel.from_stats(user_data['game_stats']['math'])
+    
+    if game.update_level():
+        flash('info', f"🚀 Level Up! Welcome to Level {game.level}!", balloons=True)
+    game.next_problem()
 
 # ======= SHAPE GAME FUNCTIONS =======
+@st.cache_resource
+def get_shape_registry():
+    """Build the quiz shapes once per process; every session draws from them"""
+    return ShapeRegistry()
+
 def initialize_shape_game():
     """Initialize the shape recognition game"""
-    # Define shapes with their SVG code, name, and fun facts
-    shapes = {
-        "circle": {
-            "svg": '<svg width="200" height="200" viewBox="0 0 200 200"><circle cx="100" cy="100" r="80" fill="#FF6B6B" stroke="#333" stroke-width="3"/></svg>',
-            "emoji": "🔴",
-            "fun_fact": "A circle is perfectly round like a ball!"
-        },
-        "square": {
-            "svg": '<svg width="200" height="200" viewBox="0 0 200 200"><rect x="40" y="40" width="120" height="120" fill="#4ECDC4" stroke="#333" stroke-width="3"/></svg>',
-            "emoji": "🟩",
-            "fun_fact": "A square has 4 equal sides and 4 corners!"
-        },
-        "triangle": {
-            "svg": '<svg width="200" height="200" viewBox="0 0 200 200"><polygon points="100,30 30,170 170,170" fill="#45B7D1" stroke="#333" stroke-width="3"/></svg>',
-            "emoji": "🔺",
-            "fun_fact": "A triangle has 3 sides and 3 corners!"
-        },
-        "rectangle": {
-            "svg": '<svg width="200" height="200" viewBox="0 0 200 200"><rect x="30" y="60" width="140" height="80" fill="#96CEB4" stroke="#333" stroke-width="3"/></svg>',
-            "emoji": "🟨",
-            "fun_fact": "A rectangle has 4 sides - 2 long and 2 short!"
-        },
-        "star": {
-            "svg": '<svg width="200" height="200" viewBox="0 0 200 200"><polygon points="100,20 120,70 175,70 135,105 150,160 100,130 50,160 65,105 25,70 80,70" fill="#FFEAA7" stroke="#333" stroke-width="3"/></svg>',
-            "emoji": "⭐",
-            "fun_fact": "A star has 5 points and shines bright!"
-        },
-        "diamond": {
-            "svg": '<svg width="200" height="200" viewBox="0 0 200 200"><polygon points="100,30 170,100 100,170 30,100" fill="#DDA0DD" stroke="#333" stroke-width="3"/></svg>',
-            "emoji": "💎",
-            "fun_fact": "A diamond is like a square turned sideways!"
-        },
-        "oval": {
-            "svg": '<svg width="200" height="200" viewBox="0 0 200 200"><ellipse cx="100" cy="100" rx="90" ry="60" fill="#FFB6C1" stroke="#333" stroke-width="3"/></svg>',
-            "emoji": "🥚",
-            "fun_fact": "An oval is like a stretched circle, like an egg!"
-        },
-        "heart": {
-            "svg": '<svg width="200" height="200" viewBox="0 0 200 200"><path d="M100,180 C100,180 20,120 20,80 C20,50 40,30 70,30 C85,30 100,40 100,40 C100,40 115,30 130,30 C160,30 180,50 180,80 C180,120 100,180 100,180 Z" fill="#FF69B4" stroke="#333" stroke-width="3"/></svg>',
-            "emoji": "💖",
-            "fun_fact": "A heart shape shows love and kindness!"
-        }
-    }
-    
-    st.session_state.shapes_data = shapes
-    st.session_state.shapes_score = 0
-    st.session_state.shapes_total_questions = 0
-    st.session_state.shapes_streak = 0
-    st.session_state.shapes_level = 1
+    st.session_state.shape_game = ShapeGame(get_shape_registry())
     st.session_state.shapes_encouragement = ""
-    generate_new_shape()
-
-def generate_new_shape():
-    """Generate a new shape for the quiz"""
-    shapes_list = list(st.session_state.shapes_data.keys())
-    st.session_state.current_shape = random.choice(shapes_list)
-    st.session_state.user_shape_answer = ""
 
 def show_shape_game():
     """Display the shape recognition game"""
@@ -945,16 +903,17 @@ def show_shape_game():
         st.rerun()
     
     # Game stats
+    game = st.session_state.shape_game
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("⭐ Score", st.session_state.shapes_score)
+        st.metric("⭐ Score", game.score)
     with col2:
-        st.metric("📝 Questions", st.session_state.shapes_total_questions)
+        st.metric("📝 Questions", game.answered)
     with col3:
-        accuracy = (st.session_state.shapes_score / max(1, st.session_state.shapes_total_questions)) * 100
+        accuracy = game.accuracy * 100
         st.metric("🎯 Accuracy", f"{accuracy:.0f}%")
     with col4:
-        st.metric("🔥 Streak", st.session_state.shapes_streak)
+        st.metric("🔥 Streak", game.streak)
     
     # Encouragement message
     if st.session_state.shapes_encouragement:
@@ -963,7 +922,10 @@ def show_shape_game():
     st.markdown("---")
     
     # Current shape display
-    current_shape_data = st.session_state.shapes_data[st.session_state.current_shape]
+    registry = get_shape_registry()
+    question = game.question
+    current_shape_data = registry.info(question['shape'])
+    current_shape_svg = registry.svg(question['shape'], *question['variant'])
     
     st.markdown("### 🔍 What shape is this?")
     
@@ -973,7 +935,7 @@ def show_shape_game():
     padding: 30px; border-radius: 20px; margin: 20px 0;">
         <div style="background: white; border-radius: 15px; padding: 20px; display: inline-block; 
         box-shadow: 0 8px 32px rgba(31, 38, 135, 0.37);">
-            {current_shape_data['svg']}
+            {current_shape_svg}
         </div>
         <div style="color: white; font-size: 24px; margin-top: 15px; font-weight: bold;">
             Can you name this shape? {current_shape_data['emoji']}
@@ -984,23 +946,11 @@ def show_shape_game():
     # Answer options (multiple choice for kindergarteners)
     st.markdown("### 🤔 Choose the correct answer:")
     
-    # Create multiple choice options
-    shape_names = list(st.session_state.shapes_data.keys())
-    correct_answer = st.session_state.current_shape
-    
-    # Generate 3 wrong answers
-    wrong_answers = [name for name in shape_names if name != correct_answer]
-    selected_wrong = random.sample(wrong_answers, min(3, len(wrong_answers)))
-    
-    # Combine and shuffle options
-    all_options = [correct_answer] + selected_wrong
-    random.shuffle(all_options)
-    
     # Create answer buttons in a 2x2 grid
     cols = st.columns(2)
-    for i, option in enumerate(all_options):
+    for i, option in enumerate(question['options']):
         with cols[i % 2]:
-            option_emoji = st.session_state.shapes_data[option]['emoji']
+            option_emoji = registry.info(option)['emoji']
             button_label = f"{option_emoji} {option.title()}"
             
             if st.button(button_label, key=f"shape_option_{i}", use_container_width=True):
@@ -1015,47 +965,48 @@ def show_shape_game():
     col1, col2, col3 = st.columns(3)
     with col2:
         if st.button("⏭️ Show Me a New Shape", key="skip_shape", use_container_width=True):
-            generate_new_shape()
+            game.next_question()
             st.session_state.shapes_encouragement = "That's okay! Let's try a different shape! 🌈"
             st.rerun()
     
     # Progress and achievements
-    if st.session_state.shapes_total_questions > 0:
+    if game.answered > 0:
         st.markdown("---")
         st.markdown("### 🏆 Your Progress")
         
-        progress_value = min(100, (st.session_state.shapes_score / max(1, st.session_state.shapes_total_questions)) * 100)
+        progress_value = min(100, accuracy)
         st.progress(progress_value / 100)
         
         # Achievement badges
         achievements = []
-        if st.session_state.shapes_score >= 1:
+        if game.score >= 1:
             achievements.append("🌟 First Shape!")
-        if st.session_state.shapes_score >= 5:
+        if game.score >= 5:
             achievements.append("🎯 Shape Detective!")
-        if st.session_state.shapes_score >= 10:
+        if game.score >= 10:
             achievements.append("👑 Shape Master!")
-        if st.session_state.shapes_streak >= 3:
+        if game.streak >= 3:
             achievements.append("🔥 On Fire!")
         if accuracy >= 80:
             achievements.append("🎖️ Super Accurate!")
         
         if achievements:
             st.markdown("**🏅 Achievements Unlocked:** " + " ".join(achievements))
+    
+    # Built once the current question is on screen
+    game.prefetch()
 
 def check_shape_answer(selected_answer):
     """Check if the shape answer is correct"""
-    correct_answer = st.session_state.current_shape
-    st.session_state.shapes_total_questions += 1
+    game = st.session_state.shape_game
+    correct_answer = game.shape
+    correct = game.check(selected_answer)
     
-    if selected_answer == correct_answer:
-        st.session_state.shapes_score += 1
-        st.session_state.shapes_streak += 1
-        
+    if correct:
         # Encouraging messages based on streak
-        if st.session_state.shapes_streak >= 5:
-            st.session_state.shapes_encouragement = f"🎉 AMAZING! You got {selected_answer} right! You're on a {st.session_state.shapes_streak} shape streak! ⭐⭐⭐"
-        elif st.session_state.shapes_streak >= 3:
+        if game.streak >= 5:
+            st.session_state.shapes_encouragement = f"🎉 AMAZING! You got {selected_answer} right! You're on a {game.streak} shape streak! ⭐⭐⭐"
+        elif game.streak >= 3:
             st.session_state.shapes_encouragement = f"🌟 Fantastic! {selected_answer.title()} is correct! You're doing great! 🎯"
         else:
             encouraging_phrases = [
@@ -1067,34 +1018,152 @@ def check_shape_answer(selected_answer):
             st.session_state.shapes_encouragement = random.choice(encouraging_phrases)
         
         # Show balloons for milestones
-        if st.session_state.shapes_score % 5 == 0:
+        if game.score % 5 == 0:
             st.balloons()
     else:
-        st.session_state.shapes_streak = 0
-        current_shape_emoji = st.session_state.shapes_data[correct_answer]['emoji']
+        current_shape_emoji = get_shape_registry().info(correct_answer)['emoji']
         st.session_state.shapes_encouragement = f"That's okay! This shape is a {correct_answer} {current_shape_emoji}. Let's try another one! 🌟"
     
+    # A game counts towards total games on its first answer
+    update_user_game_stats('shapes', {
+        'questions_answered': 1,
+        'correct_answers': int(correct),
+        'best_streak': game.streak
+    }, count_game=game.answered == 1)
+    
     # Generate new shape for next question
-    generate_new_shape()
+    game.next_question()
 
 # ======= PAINT GAME FUNCTIONS =======
+# Canvas sizes on offer; the first is the classic grid
+PAINT_CANVAS_SIZES = [12, 32, 64, 128]
+# Canvases this big are sent and shown as one PNG instead of cell by cell
+IMAGE_CANVAS_MIN_SIZE = 32
+# Width of the live canvas, split evenly between its pixels
+PAINT_CANVAS_PX = 384
+# Width gallery thumbnails of large canvases are scaled up to
+THUMBNAIL_PX = 192
+# The colors on offer; strokes from the canvas in any other color are dropped
+PAINT_COLORS = [
+    ("❤️ Red", "#FF0000"),
+    ("💙 Blue", "#0000FF"),
+    ("💚 Green", "#00FF00"),
+    ("💛 Yellow", "#FFFF00"),
+    ("🧡 Orange", "#FFA500"),
+    ("💜 Purple", "#800080"),
+    ("🤎 Brown", "#8B4513"),
+    ("🖤 Black", "#000000"),
+    ("🤍 White", "#FFFFFF"),
+    ("🩷 Pink", "#FFC0CB")
+]
+PAINT_COLOR_CODES = {code for _, code in PAINT_COLORS}
+
+# Draws the canvas in the browser and sends back one batch of painted pixels
+# per stroke, so dragging across the canvas costs one rerun instead of one per pixel
+paint_canvas_component = components.declare_component(
+    "paint_canvas", path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "paint_canvas"))
+
+# Gallery thumbnail pixel size
+THUMBNAIL_CELL_PX = 15
+
+# Artworks shown per gallery page
+GALLERY_PAGE_SIZE = 6
+# Timelapse animations kept ready to show again
+TIMELAPSE_CACHE_SIZE = 16
+
+@st.cache_resource
+def get_gallery_store():
+    """Open the art gallery once per server process; every session shares it"""
+    return GalleryStore(GALLERY_DB_FILE)
+
+@st.cache_resource
+def get_thumbnail_renderer():
+    """Thumbnail HTML cache shared by every session; equal canvases render once"""
+    return CanvasRenderer(THUMBNAIL_CELL_PX, "#ddd")
+
+@st.cache_resource
+def get_thumbnail_images():
+    """Scaled-up thumbnail PNGs of large artworks by content hash, shared by every session"""
+    return LRUCache(RENDER_CACHE_SIZE)
+
+@st.cache_resource
+def get_timelapses():
+    """Recently made timelapse animations by artwork id, shared by every session"""
+    return LRUCache(TIMELAPSE_CACHE_SIZE)
+
+def paint_action(event):
+    """Apply a paint event to the live canvas as one undo step and log it for replay"""
+    st.session_state.paint_game.apply(event, load=get_gallery_store().canvas)
+
+def stroke_event(stroke, size):
+    """Paint event for a stroke sent by the canvas component, or None if it is malformed
+
+    The component is not trusted: an unknown tool or color, or cells that
+    are not on the canvas, would raise in the paint tools or put a color
+    in the palette that no PNG can be made with.
+    """
+    if not isinstance(stroke, dict):
+        return None
+    tool = stroke.get('tool', 'brush')
+    symmetry = stroke.get('symmetry') or 'none'
+    color = stroke.get('color')
+    if tool not in TOOLS or symmetry not in SYMMETRIES or color not in PAINT_COLOR_CODES:
+        return None
+    if tool == 'brush':
+        pixels = stroke.get('pixels')
+        if not isinstance(pixels, list) or not all(type(p) is int for p in pixels):
+            return None
+        # Like paint_brush, drop pixels off the canvas (the size may have just changed)
+        pixels = [p for p in pixels if 0 <= p < size * size]
+        return ['b', color, symmetry, pixels] if pixels else None
+    cells = [stroke.get('start'), stroke.get('end')]
+    if not all(isinstance(cell, list) and len(cell) == 2 and all(type(x) is int and 0 <= x < size for x in cell)
+               for cell in cells):
+        return None
+    return ['t', tool, color, symmetry, *cells]
+
+def apply_paint_strokes():
+    """Apply the batches of strokes sent by the canvas component that have not been applied yet
+
+    The component resends every batch until it sees it acknowledged in
+    ``applied`` (client, seq), so a batch whose rerun was skipped arrives
+    with the next one.  A new client (the page was reloaded) starts over.
+    Malformed batches and strokes are dropped.
+    """
+    sent = st.session_state.get('paint_canvas_strokes')
+    if not isinstance(sent, dict) or not isinstance(sent.get('batches'), list):
+        return
+    if not isinstance(sent.get('client'), str) or not sent['client']:
+        return
+    client, last = st.session_state.paint_applied_strokes or (None, 0)
+    if client != sent['client']:
+        last = 0
+    for batch in sent['batches']:
+        if not isinstance(batch, dict) or type(batch.get('seq')) is not int or batch['seq'] <= last:
+            continue
+        last = batch['seq']
+        strokes = batch.get('strokes')
+        for stroke in strokes if isinstance(strokes, list) else []:
+            event = stroke_event(stroke, st.session_state.paint_game.canvas.size)
+            if event is not None:
+                paint_action(event)
+    st.session_state.paint_applied_strokes = (sent['client'], last)
+
 def initialize_paint_game():
     """Initialize the paint game"""
-    # Create a smaller, more manageable canvas (12x12)
-    st.session_state.paint_canvas = {}
+    # Start with the classic 12x12 canvas, all white
+    st.session_state.paint_game = PaintGame(PAINT_CANVAS_SIZES[0])
     st.session_state.paint_selected_color = "#FF0000"  # Default red
-    st.session_state.paint_canvas_size = 12
     st.session_state.paint_drawing_mode = True
-    
-    # Initialize with white canvas
-    for i in range(st.session_state.paint_canvas_size):
-        for j in range(st.session_state.paint_canvas_size):
-            st.session_state.paint_canvas[f"{i}_{j}"] = "#FFFFFF"
+    st.session_state.paint_applied_strokes = None
 
 def show_paint_game():
     """Display the paint studio game"""
     st.markdown("# 🎨 Paint Studio")
     st.markdown(f"### Let your creativity shine, {st.session_state.player_name}!")
+    st.session_state.setdefault('paint_applied_strokes', None)
+    # Strokes go in before anything is drawn so the canvas below includes them
+    apply_paint_strokes()
     
     # Back button
     if st.button("🏠 Back to Menu", key="back_paint"):
@@ -1103,23 +1172,10 @@ def show_paint_game():
     
     # Color palette
     st.markdown("### 🌈 Choose Your Color")
-    colors = [
-        ("❤️ Red", "#FF0000"),
-        ("💙 Blue", "#0000FF"),
-        ("💚 Green", "#00FF00"),
-        ("💛 Yellow", "#FFFF00"),
-        ("🧡 Orange", "#FFA500"),
-        ("💜 Purple", "#800080"),
-        ("🤎 Brown", "#8B4513"),
-        ("🖤 Black", "#000000"),
-        ("🤍 White", "#FFFFFF"),
-        ("🩷 Pink", "#FFC0CB")
-    ]
-    
     # Create color selection in rows
-    for i in range(0, len(colors), 5):
+    for i in range(0, len(PAINT_COLORS), 5):
         cols = st.columns(5)
-        for j, (color_name, color_code) in enumerate(colors[i:i+5]):
+        for j, (color_name, color_code) in enumerate(PAINT_COLORS[i:i+5]):
             with cols[j]:
                 if st.button(color_name, key=f"color_{color_code}", use_container_width=True):
                     st.session_state.paint_selected_color = color_code
@@ -1134,114 +1190,166 @@ def show_paint_game():
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         if st.button("🗑️ Clear Canvas", key="clear_canvas", use_container_width=True):
-            for i in range(st.session_state.paint_canvas_size):
-                for j in range(st.session_state.paint_canvas_size):
-                    st.session_state.paint_canvas[f"{i}_{j}"] = "#FFFFFF"
+            paint_action(['c'])
             st.rerun()
     
     with col2:
         if st.button("🌈 Rainbow Fill", key="rainbow_fill", use_container_width=True):
-            rainbow_colors = ["#FF0000", "#FF7F00", "#FFFF00", "#00FF00", "#0000FF", "#4B0082", "#9400D3"]
-            for i in range(st.session_state.paint_canvas_size):
-                for j in range(st.session_state.paint_canvas_size):
-                    st.session_state.paint_canvas[f"{i}_{j}"] = random.choice(rainbow_colors)
+            paint_action(seeded_event('r'))
             st.rerun()
     
     with col3:
         if st.button("🎯 Fill All", key="fill_all", use_container_width=True):
-            for i in range(st.session_state.paint_canvas_size):
-                for j in range(st.session_state.paint_canvas_size):
-                    st.session_state.paint_canvas[f"{i}_{j}"] = st.session_state.paint_selected_color
+            paint_action(['f', st.session_state.paint_selected_color])
             st.rerun()
     
     with col4:
         if st.button("✨ Sparkle", key="sparkle", use_container_width=True):
             # Add random sparkles
-            for _ in range(20):
-                i = random.randint(0, st.session_state.paint_canvas_size - 1)
-                j = random.randint(0, st.session_state.paint_canvas_size - 1)
-                sparkle_colors = ["#FFD700", "#FFFF00", "#FFF8DC", "#F0E68C"]
-                st.session_state.paint_canvas[f"{i}_{j}"] = random.choice(sparkle_colors)
+            paint_action(seeded_event('s'))
+            st.rerun()
+    
+    # Undo and redo
+    game = st.session_state.paint_game
+    history = game.history
+    undo_col, redo_col = st.columns(2)
+    with undo_col:
+        if st.button("↩️ Undo", key="paint_undo", disabled=not history.can_undo(), use_container_width=True):
+            paint_action(['u'])
+            st.rerun()
+    with redo_col:
+        if st.button("↪️ Redo", key="paint_redo", disabled=not history.can_redo(), use_container_width=True):
+            paint_action(['d'])
             st.rerun()
     
     # Canvas display and interaction
     st.markdown("### ✨ Your Canvas")
-    st.markdown("Click on any square below to paint it with your selected color!")
-    
-    # Create the painting canvas
-    canvas_html = '<div class="paint-canvas-container"><table style="border-collapse: collapse; margin: auto;">'
+    st.markdown("Click or drag across the canvas to paint with your selected color and tool!")
     
-    for i in range(st.session_state.paint_canvas_size):
-        canvas_html += '<tr>'
-        for j in range(st.session_state.paint_canvas_size):
-            color = st.session_state.paint_canvas.get(f"{i}_{j}", "#FFFFFF")
-            canvas_html += f'<td style="width: 30px; height: 30px; background-color: {color}; border: 1px solid #ccc; cursor: pointer;" onclick=""></td>'
-        canvas_html += '</tr>'
-    
-    canvas_html += '</table></div>'
-    st.markdown(canvas_html, unsafe_allow_html=True)
-    
-    # Interactive painting using buttons (simplified approach)
-    st.markdown("**Click the buttons below to paint:**")
+    size_choice = st.selectbox("Canvas size", PAINT_CANVAS_SIZES,
+                               index=PAINT_CANVAS_SIZES.index(game.canvas.size),
+                               format_func=lambda n: f"{n} x {n}")
+    if size_choice != game.canvas.size:
+        paint_action(['n', size_choice])
+        st.rerun()
     
-    # Create painting interface with smaller grid for better performance
-    for i in range(st.session_state.paint_canvas_size):
-        cols = st.columns(st.session_state.paint_canvas_size)
-        for j in range(st.session_state.paint_canvas_size):
-            with cols[j]:
-                current_color = st.session_state.paint_canvas.get(f"{i}_{j}", "#FFFFFF")
-                # Show colored button
-                button_style = f"background-color: {current_color}; width: 25px; height: 25px; border: 1px solid #333;"
-                if st.button("⬜", key=f"pixel_{i}_{j}", help=f"Paint ({i},{j})"):
-                    st.session_state.paint_canvas[f"{i}_{j}"] = st.session_state.paint_selected_color
-                    st.rerun()
+    # Drawing tools for the canvas
+    tool_col, symmetry_col = st.columns(2)
+    with tool_col:
+        st.radio("🖌️ Tool", list(TOOLS), format_func=TOOLS.get, horizontal=True, key="paint_tool")
+    with symmetry_col:
+        st.radio("🪞 Symmetry", list(SYMMETRIES), format_func=SYMMETRIES.get, horizontal=True, key="paint_symmetry")
+    
+    canvas = game.canvas
+    if canvas.size >= IMAGE_CANVAS_MIN_SIZE:
+        # One cached PNG instead of thousands of pixel values per rerun
+        image = "data:image/png;base64," + base64.b64encode(canvas.to_png()).decode()
+        pixels, palette = None, None
+    else:
+        image, pixels, palette = None, canvas.pixels.tolist(), canvas.palette
+    paint_canvas_component(
+        size=canvas.size,
+        pixels=pixels,
+        palette=palette,
+        image=image,
+        color=st.session_state.paint_selected_color,
+        tool=st.session_state.paint_tool,
+        symmetry=st.session_state.paint_symmetry,
+        cell=max(1, PAINT_CANVAS_PX // canvas.size),
+        grid=canvas.size < IMAGE_CANVAS_MIN_SIZE,
+        applied=st.session_state.paint_applied_strokes,
+        low_power=low_power,
+        key="paint_canvas_strokes",
+        default=None,
+    )
     
     # Art gallery
     st.markdown("---")
     st.markdown("### 🏛️ Art Gallery")
     
+    gallery = get_gallery_store()
     with st.expander("💾 Save Your Masterpiece"):
         art_name = st.text_input("Name your artwork:", placeholder="My Beautiful Creation", key="art_name_input")
         if st.button("🎨 Save to Gallery", key="save_art") and art_name:
-            if 'art_gallery' not in st.session_state:
-                st.session_state.art_gallery = []
-            
-            st.session_state.art_gallery.append({
-                'name': art_name,
-                'artist': st.session_state.player_name,
-                'canvas': st.session_state.paint_canvas.copy(),
-                'timestamp': time.time()
-            })
+            # Identical pictures are stored once however often they are saved
+            gallery.save(st.session_state.current_user, art_name, st.session_state.player_name,
+                         game.canvas, events=game.events.encode())
+            update_user_game_stats('paint', {'artworks_created': 1})
             st.success(f"🎉 '{art_name}' has been saved to your gallery!")
     
     # Display gallery
-    if 'art_gallery' in st.session_state and st.session_state.art_gallery:
-        with st.expander(f"🖼️ {st.session_state.player_name}'s Art Collection ({len(st.session_state.art_gallery)} artworks)"):
-            for idx, artwork in enumerate(st.session_state.art_gallery):
-                st.markdown(f"**🎨 {artwork['name']}** by {artwork['artist']}")
-                
-                # Display a mini version of the artwork
-                mini_canvas = '<div style="margin: 10px 0;"><table style="border-collapse: collapse;">'
-                for i in range(st.session_state.paint_canvas_size):
-                    mini_canvas += '<tr>'
-                    for j in range(st.session_state.paint_canvas_size):
-                        color = artwork['canvas'].get(f"{i}_{j}", "#FFFFFF")
-                        mini_canvas += f'<td style="width: 15px; height: 15px; background-color: {color}; border: 1px solid #ddd;"></td>'
-                    mini_canvas += '</tr>'
-                mini_canvas += '</table></div>'
-                st.markdown(mini_canvas, unsafe_allow_html=True)
-                
-                # Option to load artwork back to canvas
-                if st.button(f"📥 Load '{artwork['name']}'", key=f"load_art_{idx}"):
-                    st.session_state.paint_canvas = artwork['canvas'].copy()
-                    st.success(f"Loaded '{artwork['name']}' to canvas!")
-                    st.rerun()
-                
-                st.markdown("---")
+    artwork_count = gallery.count(st.session_state.current_user)
+    if artwork_count:
+        with st.expander(f"🖼️ {st.session_state.player_name}'s Art Collection ({artwork_count} artworks)"):
+            show_gallery_page(gallery, artwork_count)
+
+def show_gallery_page(gallery, artwork_count):
+    """Show one page of the player's saved artworks, fetching only their pictures"""
+    pages = (artwork_count + GALLERY_PAGE_SIZE - 1) // GALLERY_PAGE_SIZE
+    st.session_state.gallery_page = min(st.session_state.get('gallery_page', 0), pages - 1)
+    renderer = get_thumbnail_renderer()
+    images = get_thumbnail_images()
+    
+    for artwork in gallery.page(st.session_state.current_user, st.session_state.gallery_page, GALLERY_PAGE_SIZE):
+        st.markdown(f"**🎨 {artwork['name']}** by {artwork['artist']}")
+        
+        # Display a mini version of the artwork, rendered once per picture
+        if artwork['size'] >= IMAGE_CANVAS_MIN_SIZE:
+            thumbnail = images.get(artwork['hash'])
+            if thumbnail is None:
+                thumbnail = gallery.canvas(artwork['hash']).to_png(scale=max(1, THUMBNAIL_PX // artwork['size']))
+                images.put(artwork['hash'], thumbnail)
+            st.image(thumbnail)
+        else:
+            mini_canvas = renderer.cached(artwork['hash'])
+            if mini_canvas is None:
+                mini_canvas = renderer.render(gallery.canvas(artwork['hash']), key=artwork['hash'])
+            st.markdown(f'<div style="margin: 10px 0;">{mini_canvas}</div>', unsafe_allow_html=True)
+        
+        # Option to load artwork back to canvas
+        if st.button(f"📥 Load '{artwork['name']}'", key=f"load_art_{artwork['id']}"):
+            paint_action(['l', artwork['hash']])
+            flash("success", f"Loaded '{artwork['name']}' to canvas!")
+            st.rerun()
+        
+        if artwork['has_events']:
+            show_timelapse(gallery, artwork)
+        
+        st.markdown("---")
+    
+    # Page controls
+    show_page_controls('gallery_page', pages, 'gallery')
+
+def show_timelapse(gallery, artwork):
+    """Offer an animation replaying how an artwork was drawn, shown once asked for"""
+    if st.session_state.get('timelapse_shown') != artwork['id']:
+        if st.button(f"🎬 Timelapse of '{artwork['name']}'", key=f"timelapse_{artwork['id']}"):
+            st.session_state.timelapse_shown = artwork['id']
+            st.rerun()
+        return
+    timelapses = get_timelapses()
+    animation = timelapses.get(artwork['id'])
+    if animation is None:
+        # Frames are replayed and encoded one at a time straight into the file
+        out = io.BytesIO()
+        write_timelapse(EventLog.decode(gallery.events(artwork['id'])).events, out, load=gallery.canvas)
+        animation = out.getvalue()
+        timelapses.put(artwork['id'], animation)
+    # Served by URL as it is; a width below the frame size would resize it to a still picture
+    st.image(animation, output_format="PNG")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("💾 Download timelapse", animation, file_name=f"{artwork['name']}.png",
+                           mime="image/apng", key=f"timelapse_download_{artwork['id']}")
+    with col2:
+        if st.button("🙈 Hide timelapse", key=f"timelapse_hide_{artwork['id']}"):
+            st.session_state.timelapse_shown = None
+            st.rerun()
 
 # ======= MAIN APPLICATION =======
 def main():
     """Main application logic"""
+    show_feedback()
     if st.session_state.current_game == 'menu':
         show_main_menu()
     elif st.session_state.current_game == 'memory':
@@ -1252,6 +1360,7 @@ def main():
         show_shape_game()
     elif st.session_state.current_game == 'paint':
         show_paint_game()
+    start_rerun_timer()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,100 @@
+"""Time memory game deals, moves and board payloads at every board size
+
+For each size this measures dealing a board, applying one move (what a
+rerun does per move the board sends), building and JSON-encoding the
+arguments the board component is sent, and the memory the board takes
+in session state.  The old game kept lists of emoji strings and flags
+and drew one HTML block per face-up card; its session state and HTML
+are measured too for comparison.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_memory
+"""
+import json
+import random
+import sys
+import timeit
+
+from memory_board import MEMORY_BOARD_SIZES, MemoryBoard
+
+REPEAT = 2000
+
+
+def deep_size(obj):
+    """Approximate bytes held by session state values and what they reference"""
+    if isinstance(obj, MemoryBoard):
+        return sys.getsizeof(obj) + sum(deep_size(getattr(obj, name)) for name in MemoryBoard.__slots__)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(deep_size(v) for v in obj.values())
+    if isinstance(obj, list):
+        # Items shared between slots (the same emoji, True) are counted once
+        return sys.getsizeof(obj) + sum(sys.getsizeof(item) for item in {id(item): item for item in obj}.values())
+    return sys.getsizeof(obj)
+
+
+def board_args(board):
+    """The arguments show_memory_game sends the board component"""
+    return {'deal': 1, 'faces': board.faces, 'cards': board.cards.tolist(), 'matched': board.matched_list(),
+            'seen': board.moves, 'cols': board.cols, 'card_px': 64, 'mismatch_ms': 1000, 'completed': board.completed}
+
+
+def old_state(board):
+    """The old session state: emoji per card plus revealed and matched flags"""
+    cards = [board.faces[face] for face in board.cards.tolist()]
+    return {'memory_cards': cards, 'memory_revealed': [True] * len(cards), 'memory_matched': [True] * len(cards)}
+
+
+def old_html(cards):
+    """The old per-card HTML blocks, as drawn when every card is face up"""
+    return [f"""
+                    <div style='background-color: #90EE90; border: 2px solid #32CD32; border-radius: 15px;
+                    text-align: center; padding: 20px; font-size: 40px; height: 100px;
+                    display: flex; align-items: center; justify-content: center;'>
+                        {card}
+                    </div>""" for card in cards]
+
+
+def random_moves(board, rng):
+    """Moves that finish the board, with some misses along the way"""
+    positions = {}
+    for index, face in enumerate(board.cards.tolist()):
+        positions.setdefault(face, []).append(index)
+    moves = []
+    for first, second in positions.values():
+        moves.append((first, rng.randrange(len(board.cards))))
+        moves.append((first, second))
+    return moves
+
+
+def main():
+    rng = random.Random(1)
+    print(f"{'board':>8}{'deal':>12}{'move':>12}{'args':>12}{'args KB':>10}{'state B':>10}"
+          f"{'old state B':>13}{'old html':>12}{'old html KB':>13}")
+    for rows, cols in MEMORY_BOARD_SIZES:
+        deal = timeit.timeit(lambda: MemoryBoard(rows, cols, rng.getrandbits(32)), number=REPEAT) / REPEAT
+
+        board = MemoryBoard(rows, cols, 7)
+        moves = random_moves(board, rng)
+        number = 0
+        start = timeit.default_timer()
+        for _ in range(REPEAT // len(moves) + 1):
+            board = MemoryBoard(rows, cols, 7)
+            for move in moves:
+                board.play(*move)
+            number += len(moves)
+        move = (timeit.default_timer() - start) / number
+
+        payload = json.dumps(board_args(board))
+        args = timeit.timeit(lambda: json.dumps(board_args(board)), number=REPEAT) / REPEAT
+        state = deep_size(board)
+        old = old_state(board)
+        old_bytes = deep_size(old)
+        html = timeit.timeit(lambda: old_html(old['memory_cards']), number=REPEAT) / REPEAT
+        html_bytes = sum(len(block.encode()) for block in old_html(old['memory_cards']))
+        print(f"{f'{rows}x{cols}':>8}{deal * 1e6:>9.1f} us{move * 1e6:>9.2f} us{args * 1e6:>9.1f} us"
+              f"{len(payload) / 1024:>10.1f}{state:>10}{old_bytes:>13}{html * 1e6:>9.1f} us{html_bytes / 1024:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
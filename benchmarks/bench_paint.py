@@ -0,0 +1,138 @@
+"""Compare the old dict canvas with the palette-indexed Canvas
+
+Measures memory per canvas and the time of each whole-canvas tool, a
+copy (what a gallery save does) and reading every pixel (what rendering
+does).  Then compares ways of sending a canvas to the browser: the old
+HTML table, the pixel list the canvas component takes for small canvases
+and the PNG large canvases are sent as, by render time and payload size.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_paint
+"""
+import base64
+import json
+import random
+import sys
+import timeit
+
+from paint_canvas import RAINBOW_COLORS, SPARKLE_COLORS, Canvas
+
+SIZES = [12, 32, 64, 128]
+REPEAT = 200
+
+
+def deep_size(obj):
+    """Approximate bytes held by a canvas and everything it references"""
+    if isinstance(obj, Canvas):
+        return sys.getsizeof(obj) + sys.getsizeof(obj.pixels) + deep_size(obj.palette) + deep_size(obj._palette_index)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in obj.items())
+    if isinstance(obj, list):
+        return sys.getsizeof(obj) + sum(sys.getsizeof(item) for item in obj)
+    return sys.getsizeof(obj)
+
+
+def dict_canvas(size):
+    """The old canvas: one "i_j" key per pixel"""
+    return {f"{i}_{j}": "#FFFFFF" for i in range(size) for j in range(size)}
+
+
+def dict_ops(size):
+    """The old whole-canvas tools, copied from the pre-Canvas Paint Studio"""
+    canvas = dict_canvas(size)
+
+    def clear():
+        for i in range(size):
+            for j in range(size):
+                canvas[f"{i}_{j}"] = "#FFFFFF"
+
+    def fill():
+        for i in range(size):
+            for j in range(size):
+                canvas[f"{i}_{j}"] = "#FF0000"
+
+    def rainbow():
+        for i in range(size):
+            for j in range(size):
+                canvas[f"{i}_{j}"] = random.choice(RAINBOW_COLORS)
+
+    def sparkle():
+        for _ in range(20):
+            i = random.randint(0, size - 1)
+            j = random.randint(0, size - 1)
+            canvas[f"{i}_{j}"] = random.choice(SPARKLE_COLORS)
+
+    def read():
+        return [canvas.get(f"{i}_{j}", "#FFFFFF") for i in range(size) for j in range(size)]
+
+    return canvas, {'clear': clear, 'fill': fill, 'rainbow': rainbow, 'sparkle': sparkle,
+                    'copy': canvas.copy, 'read all': read}
+
+
+def canvas_ops(size):
+    """The same tools on the palette-indexed Canvas"""
+    canvas = Canvas(size)
+    return canvas, {'clear': canvas.clear, 'fill': lambda: canvas.fill("#FF0000"),
+                    'rainbow': canvas.rainbow_fill, 'sparkle': canvas.sparkle,
+                    'copy': canvas.copy, 'read all': canvas.colors}
+
+
+def html_table(canvas):
+    """The old live canvas table, built cell by cell"""
+    html = '<div class="paint-canvas-container"><table style="border-collapse: collapse; margin: auto;">'
+    for i in range(canvas.size):
+        html += '<tr>'
+        for j in range(canvas.size):
+            html += f'<td style="width: 30px; height: 30px; background-color: {canvas.get(i, j)}; border: 1px solid #ccc; cursor: pointer;" onclick=""></td>'
+        html += '</tr>'
+    return html + '</table></div>'
+
+
+def pixel_list(canvas):
+    """Component arguments for a canvas sent pixel by pixel"""
+    return json.dumps({'pixels': canvas.pixels.tolist(), 'palette': canvas.palette})
+
+
+def png_uncached(canvas):
+    """A PNG data URL encoded from scratch"""
+    canvas._png.clear()
+    return "data:image/png;base64," + base64.b64encode(canvas.to_png()).decode()
+
+
+def png_cached(canvas):
+    """A PNG data URL for an unchanged canvas"""
+    return "data:image/png;base64," + base64.b64encode(canvas.to_png()).decode()
+
+
+def render_benchmark():
+    print(f"\n{'size':>8} {'format':>12} {'render':>12} {'payload':>12}")
+    for size in SIZES:
+        canvas = Canvas(size)
+        canvas.rainbow_fill()
+        canvas.sparkle()
+        for name, render in [('html table', html_table), ('pixel list', pixel_list),
+                             ('png', png_uncached), ('png cached', png_cached)]:
+            number = 5 if render is html_table and size > 32 else 50
+            seconds = timeit.timeit(lambda: render(canvas), number=number) / number
+            payload = len(render(canvas))
+            print(f"{size:>3}x{size:<4} {name:>12} {seconds * 1e3:>9.3f} ms {payload / 1024:>8.1f} KiB")
+
+
+def main():
+    for size in SIZES:
+        old, old_ops = dict_ops(size)
+        new, new_ops = canvas_ops(size)
+        new.rainbow_fill()
+        print(f"\n{size}x{size} canvas: dict {deep_size(old) / 1024:.1f} KiB, "
+              f"Canvas {deep_size(new) / 1024:.1f} KiB")
+        print(f"{'operation':>10} {'dict':>12} {'Canvas':>12} {'speedup':>9}")
+        for name in old_ops:
+            old_time = timeit.timeit(old_ops[name], number=REPEAT) / REPEAT
+            new_time = timeit.timeit(new_ops[name], number=REPEAT) / REPEAT
+            print(f"{name:>10} {old_time * 1e6:>9.1f} us {new_time * 1e6:>9.1f} us {old_time / new_time:>8.1f}x")
+    render_benchmark()
+
+
+if __name__ == "__main__":
+    main()
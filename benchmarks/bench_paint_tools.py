@@ -0,0 +1,86 @@
+"""Time each paint tool at several canvas sizes
+
+Every tool draws across most of the canvas so the numbers show how it
+scales.  Flood fill is also timed against a plain pixel-by-pixel
+breadth-first fill for comparison.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_paint_tools
+"""
+import random
+import timeit
+from collections import deque
+
+from paint_canvas import Canvas
+from paint_tools import apply_tool, paint_brush
+
+SIZES = [12, 32, 64, 128]
+REPEAT = 50
+
+
+def pixel_flood_fill(canvas, seed, color):
+    """Breadth-first flood fill one pixel at a time"""
+    size = canvas.size
+    target = canvas.get(*seed)
+    if target == color:
+        return
+    queue = deque([seed])
+    canvas.set(*seed, color)
+    while queue:
+        i, j = queue.popleft()
+        for ni, nj in ((i + 1, j), (i - 1, j), (i, j + 1), (i, j - 1)):
+            if 0 <= ni < size and 0 <= nj < size and canvas.get(ni, nj) == target:
+                canvas.set(ni, nj, color)
+                queue.append((ni, nj))
+
+
+def maze_canvas(size, rng):
+    """A canvas with scattered walls, so fills have to find their way around"""
+    canvas = Canvas(size)
+    canvas.paint_pixels(rng.sample(range(size * size), size * size // 5), "#000000")
+    canvas.set(0, 0, "#FFFFFF")
+    return canvas
+
+
+def tool_cases(size):
+    """(name, function of a canvas) for each tool drawn across the canvas"""
+    last = size - 1
+    middle = size // 2
+    brush = [i * size + i for i in range(size)]
+    return [
+        ('brush', lambda c: paint_brush(c, brush, "#FF0000")),
+        ('line', lambda c: apply_tool(c, 'line', (0, 0), (last, last // 3), "#FF0000")),
+        ('rect', lambda c: apply_tool(c, 'rect', (1, 1), (last - 1, last - 1), "#FF0000")),
+        ('rect fill', lambda c: apply_tool(c, 'rect_fill', (1, 1), (last - 1, last - 1), "#FF0000")),
+        ('circle', lambda c: apply_tool(c, 'circle', (middle, middle), (middle, last - 1), "#FF0000")),
+        ('circle fill', lambda c: apply_tool(c, 'circle_fill', (middle, middle), (middle, last - 1), "#FF0000")),
+        ('mirror 4x', lambda c: apply_tool(c, 'line', (0, 0), (middle, last), "#FF0000", 'quad')),
+    ]
+
+
+def main():
+    rng = random.Random(1)
+    print(f"{'tool':>12}" + "".join(f"{f'{size}x{size}':>12}" for size in SIZES))
+    names = [name for name, _ in tool_cases(SIZES[0])]
+    timings = {name: [] for name in names + ['flood fill', 'pixel fill']}
+    for size in SIZES:
+        canvas = Canvas(size)
+        for name, draw in tool_cases(size):
+            timings[name].append(timeit.timeit(lambda: draw(canvas), number=REPEAT) / REPEAT)
+        # Fills alternate colors so every run repaints the whole open area
+        maze = maze_canvas(size, rng)
+        colors = iter(["#FF0000", "#FFFFFF"] * REPEAT)
+        timings['flood fill'].append(timeit.timeit(
+            lambda: apply_tool(maze, 'fill', (0, 0), (0, 0), next(colors)), number=REPEAT) / REPEAT)
+        maze = maze_canvas(size, rng)
+        colors = iter(["#FF0000", "#FFFFFF"] * REPEAT)
+        number = 5 if size > 32 else REPEAT
+        timings['pixel fill'].append(timeit.timeit(
+            lambda: pixel_flood_fill(maze, (0, 0), next(colors)), number=number) / number)
+    for name, seconds in timings.items():
+        print(f"{name:>12}" + "".join(f"{s * 1e6:>9.1f} us" for s in seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Time password hashing for each KDF setting and the hashing pool's throughput
+
+Use it to pick KIDS_GAMES_SCRYPT_N / KIDS_GAMES_PBKDF2_ITERATIONS for the
+server: aim for a cost that takes tens of milliseconds per hash.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_passwords
+"""
+import time
+from concurrent.futures import wait
+
+import passwords
+
+SETTINGS = [
+    ('scrypt', {'n': 2 ** 13}),
+    ('scrypt', {'n': 2 ** 14}),
+    ('scrypt', {'n': 2 ** 15}),
+    ('pbkdf2_sha256', {'iterations': 100000}),
+    ('pbkdf2_sha256', {'iterations': 200000}),
+    ('pbkdf2_sha256', {'iterations': 600000}),
+]
+ROUNDS = 5
+LOGINS = 32
+
+
+def bench_hash(kdf, params):
+    """Average seconds per hash_password call"""
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        passwords.hash_password('correct horse', kdf=kdf, **params)
+    return (time.perf_counter() - start) / ROUNDS
+
+
+def bench_pool():
+    """Logins per second through the hashing pool with the default settings"""
+    stored = passwords.hash_password('correct horse')
+    start = time.perf_counter()
+    # Different usernames so the verified cache does not short-circuit
+    futures = [passwords.submit_check_password(f"user{i}", 'correct horse', stored) for i in range(LOGINS)]
+    futures = [future for future in futures if future is not None]
+    wait(futures)
+    return len(futures) / (time.perf_counter() - start), LOGINS - len(futures)
+
+
+def bench_cached_login():
+    """Seconds per login once the password has been verified before"""
+    stored = passwords.hash_password('correct horse')
+    passwords.check_password('cached', 'correct horse', stored)
+    start = time.perf_counter()
+    for _ in range(1000):
+        passwords.check_password('cached', 'correct horse', stored)
+    return (time.perf_counter() - start) / 1000
+
+
+def main():
+    print(f"{'kdf':>14} {'cost':>10} {'per hash':>12}")
+    for kdf, params in SETTINGS:
+        cost = next(iter(params.values()))
+        print(f"{kdf:>14} {cost:>10} {bench_hash(kdf, params) * 1e3:>9.1f} ms")
+    rate, rejected = bench_pool()
+    print(f"\nPool ({passwords.HASH_WORKERS} workers): {rate:.1f} logins/s, {rejected} turned away of {LOGINS}")
+    print(f"Cached re-login: {bench_cached_login() * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compare the cost of saving one user's change as the number of users grows
+
+Run from the repository root:
+
+    python -m benchmarks.bench_user_store
+"""
+import json
+import os
+import tempfile
+import time
+
+from user_store import JournalUserStore, SQLiteUserStore, WriteBehindUserStore
+
+USER_COUNTS = [100, 1000, 10000]
+WRITES = 20
+
+
+def make_user(i):
+    """Build a user record shaped like the ones register_user creates"""
+    return {
+        'password': '0' * 64,
+        'display_name': f"Player {i}",
+        'created_date': '2024-01-01T00:00:00',
+        'last_login': None,
+        'total_games_played': 0,
+        'game_stats': {
+            'memory': {'games_played': 0, 'best_moves': None, 'best_time': None},
+            'math': {'questions_answered': 0, 'correct_answers': 0, 'best_streak': 0},
+            'shapes': {'questions_answered': 0, 'correct_answers': 0, 'best_streak': 0},
+            'paint': {'artworks_created': 0}
+        }
+    }
+
+
+def bench_full_rewrite(path, users):
+    """Old behaviour: rewrite the whole file for every change"""
+    start = time.perf_counter()
+    for n in range(WRITES):
+        users['user0']['total_games_played'] = n
+        with open(path, 'w') as f:
+            json.dump(users, f, indent=2)
+    return (time.perf_counter() - start) / WRITES
+
+
+def bench_journal(path, users):
+    """New behaviour: append the changed record to the journal"""
+    with open(path, 'w') as f:
+        json.dump(users, f)
+    # Keep compaction out of the measured loop
+    store = JournalUserStore(path, compact_threshold=float('inf'))
+    record = store.get('user0')
+    start = time.perf_counter()
+    for n in range(WRITES):
+        record['total_games_played'] = n
+        store.put('user0', record)
+    return (time.perf_counter() - start) / WRITES
+
+
+def bench_sqlite(path, users):
+    """SQLite backend: read and replace the changed user's row"""
+    store = SQLiteUserStore(path)
+    store.put_many(users.items())
+    start = time.perf_counter()
+    for n in range(WRITES):
+        record = store.get('user0')
+        record['total_games_played'] = n
+        store.put('user0', record)
+    elapsed = (time.perf_counter() - start) / WRITES
+    store.close()
+    return elapsed
+
+
+def bench_write_behind(path, users):
+    """SQLite backend behind a write-behind buffer flushing every 500 ms"""
+    store = WriteBehindUserStore(SQLiteUserStore(path), flush_ms=500)
+    store.inner.put_many(users.items())
+    start = time.perf_counter()
+    for n in range(WRITES):
+        store.update('user0', lambda record: record.update(total_games_played=n))
+    elapsed = (time.perf_counter() - start) / WRITES
+    store.close()
+    return elapsed
+
+
+def main():
+    print(f"{'users':>8} {'full rewrite':>14} {'journal':>12} {'sqlite':>12} {'write-behind':>14}")
+    for count in USER_COUNTS:
+        users = {f"user{i}": make_user(i) for i in range(count)}
+        with tempfile.TemporaryDirectory() as tmp:
+            rewrite = bench_full_rewrite(os.path.join(tmp, 'rewrite.json'), users)
+            journal = bench_journal(os.path.join(tmp, 'journal.json'), users)
+            sqlite = bench_sqlite(os.path.join(tmp, 'users.db'), users)
+            buffered = bench_write_behind(os.path.join(tmp, 'buffered.db'), users)
+        print(
+            f"{count:>8} {rewrite * 1e3:>11.3f} ms {journal * 1e3:>9.3f} ms "
+            f"{sqlite * 1e3:>9.3f} ms {buffered * 1e3:>11.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
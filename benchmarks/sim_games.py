@@ -0,0 +1,244 @@
+"""Play whole games through the headless engines on every core, to profile and fuzz them
+
+Each worker process builds the problem bank and shape registry once, then
+plays games with no Streamlit in the loop: memory boards of every size
+cleared by a player who remembers what they have seen, math games
+answered by a synthetic learner, shape quizzes and paint sessions of
+random events.  Moves and answers are mixed with junk (cards off the
+board, the same card twice, wrong types) the way a tampered client could
+send them.  After every game the engine's invariants are checked, and
+every ROUND_TRIP_EVERY games its state goes through JSON and from_dict()
+and must come back the same.
+
+Every game is played from its own seed, so a failure prints the kind and
+seed to replay it with play(kind, seed).  Pass "profile" to run one chunk
+of each kind in-process under cProfile instead.
+
+Run from the repository root:
+
+    python -m benchmarks.sim_games [profile]
+"""
+import cProfile
+import json
+import math
+import multiprocessing
+import os
+import pstats
+import random
+import sys
+import time
+
+from game_engine import MathGame, MemoryGame, PaintGame, ShapeGame
+from math_problems import ProblemBank
+from math_skill import success_probability
+from memory_board import MEMORY_BOARD_SIZES
+from paint_tools import SYMMETRIES, TOOLS
+from shapes import ShapeRegistry
+
+WORKERS = os.cpu_count() or 1
+# Games played per kind, and per task sent to a worker
+GAMES = {'memory': 200000, 'math': 20000, 'shapes': 200000, 'paint': 2000}
+CHUNK = {'memory': 5000, 'math': 500, 'shapes': 5000, 'paint': 50}
+MATH_ANSWERS = 30
+SHAPE_ANSWERS = 10
+PAINT_EVENTS = 30
+PAINT_SIZES = [12, 32]
+ROUND_TRIP_EVERY = 20
+# Share of moves and answers replaced by junk
+JUNK = 0.05
+JUNK_INDICES = [-1, 10 ** 6, None, '0', 1.0, True, [0]]
+# Failures reported per kind
+MAX_FAILURES = 5
+
+# Built once per worker process, like st.cache_resource does per server
+_bank = None
+_registry = None
+
+
+def init_worker():
+    """Build the shared read-only objects in this process"""
+    global _bank, _registry
+    _bank = ProblemBank()
+    _registry = ShapeRegistry()
+
+
+def round_trip(data):
+    """State as it comes back from JSON"""
+    return json.loads(json.dumps(data))
+
+
+def play_memory(rng, check_state):
+    """Clear a board of random size, remembering every card seen"""
+    rows, cols = rng.choice(MEMORY_BOARD_SIZES)
+    game = MemoryGame(rows, cols, rng.getrandbits(32), started=0.0)
+    board = game.board
+    cards = board.cards.tolist()
+    unknown = list(range(rows * cols))
+    rng.shuffle(unknown)
+    # face: the one card of it seen so far; and pairs whose cards are both known
+    seen = {}
+    ready = []
+    legal = 0
+    turn = 0
+    while not board.completed:
+        turn += 1
+        if rng.random() < JUNK:
+            game.play(rng.choice(JUNK_INDICES), rng.choice(JUNK_INDICES + [0]), now=float(turn))
+        else:
+            if ready:
+                first, second = ready.pop()
+            else:
+                first = unknown.pop()
+                second = seen.pop(cards[first], None)
+                if second is None:
+                    second = unknown.pop()
+                    if cards[second] != cards[first]:
+                        seen[cards[first]] = first
+                        # The second card may complete a pair seen before
+                        partner = seen.pop(cards[second], None)
+                        if partner is None:
+                            seen[cards[second]] = second
+                        else:
+                            ready.append((partner, second))
+            game.play(first, second, now=float(turn))
+            legal += 1
+        assert board.moves == legal, "moves counted for a move that was not allowed"
+        assert bin(board.matched).count('1') == 2 * board.pairs_found, "matched cards do not make up the pairs"
+    assert game.finished == float(turn) and game.play(0, 1) is None, "a finished game took another move"
+    if check_state:
+        copy = MemoryGame.from_dict(round_trip(game.to_dict()))
+        assert copy.to_dict() == game.to_dict() and (copy.board.cards == board.cards).all(), "memory round trip"
+
+
+def play_math(rng, check_state):
+    """A learner of random ability answers MATH_ANSWERS problems"""
+    game = MathGame(_bank, rng=rng)
+    ability = rng.uniform(0, 6)
+    for _ in range(MATH_ANSWERS):
+        a, operation, b = game.question.split()
+        a, b = int(a), int(b)
+        expected = {'+': a + b, '-': a - b, '×': a * b, '÷': a // b}[operation]
+        assert game.answer == expected and (operation != '÷' or a % b == 0), f"wrong answer for {game.question}"
+        assert operation == game.operation and game.operation in game.skill.operations(), "problem off the menu"
+        if rng.random() < JUNK:
+            game.check(rng.choice(JUNK_INDICES))
+        else:
+            right = rng.random() < success_probability(ability, game.difficulty)
+            game.check(game.answer if right else game.answer + 1)
+        game.update_level()
+        game.next_problem()
+        game.prefetch()
+    assert game.score <= game.answered == MATH_ANSWERS and game.streak <= game.score, "math score"
+    assert all(math.isfinite(rating) for rating in game.skill.ratings.values()), "rating blew up"
+    if check_state:
+        data = round_trip(game.to_dict())
+        assert MathGame.from_dict(data, _bank).to_dict() == data, "math round trip"
+
+
+def play_shapes(rng, check_state):
+    """SHAPE_ANSWERS questions answered at random"""
+    game = ShapeGame(_registry, rng=rng)
+    names = _registry.names()
+    for _ in range(SHAPE_ANSWERS):
+        question = game.question
+        options = question['options']
+        assert game.shape in options and len(set(options)) == len(options) == 4, "bad options"
+        assert _registry.svg(game.shape, *question['variant']).startswith('<svg'), "no picture"
+        game.check(rng.choice(options if rng.random() > JUNK else names + JUNK_INDICES))
+        game.next_question()
+        assert game.shape != question['shape'], "the same shape twice in a row"
+        game.prefetch()
+    assert game.score <= game.answered == SHAPE_ANSWERS and game.streak <= game.score, "shapes score"
+    if check_state:
+        data = round_trip(game.to_dict())
+        assert ShapeGame.from_dict(data, _registry).to_dict() == data, "shapes round trip"
+
+
+def random_paint_event(rng, size):
+    """One event like the paint studio sends, drawn at random"""
+    color = "#%06X" % rng.getrandbits(24)
+    kind = rng.choice('bbbtttfcrsudn')
+    symmetry = rng.choice(list(SYMMETRIES))
+    if kind == 'b':
+        return ['b', color, symmetry, rng.sample(range(size * size), rng.randint(1, size))]
+    if kind == 't':
+        tool = rng.choice([tool for tool in TOOLS if tool != 'brush'])
+        point = lambda: [rng.randrange(size), rng.randrange(size)]
+        return ['t', tool, color, symmetry, point(), point()]
+    if kind == 'f':
+        return ['f', color]
+    if kind in 'rs':
+        return [kind, rng.getrandbits(32)]
+    if kind == 'n':
+        return ['n', rng.choice(PAINT_SIZES)]
+    return [kind]
+
+
+def play_paint(rng, check_state):
+    """PAINT_EVENTS random events, undo and redo included"""
+    game = PaintGame(rng.choice(PAINT_SIZES))
+    for _ in range(PAINT_EVENTS):
+        game.apply(random_paint_event(rng, game.canvas.size))
+        assert len(game.canvas.palette) <= 256 and game.canvas.pixels.size == game.canvas.size ** 2, "bad canvas"
+    if check_state:
+        copy = PaintGame.from_dict(round_trip(game.to_dict()))
+        assert copy.canvas == game.canvas, "replay drew a different canvas"
+        assert (copy.history.can_undo(), copy.history.can_redo()) == (game.history.can_undo(), game.history.can_redo())
+
+
+PLAYERS = {'memory': play_memory, 'math': play_math, 'shapes': play_shapes, 'paint': play_paint}
+
+
+def play(kind, seed):
+    """Play one game of kind from seed; raises AssertionError if an invariant breaks"""
+    if _bank is None:
+        init_worker()
+    PLAYERS[kind](random.Random(seed), seed % ROUND_TRIP_EVERY == 0)
+
+
+def play_chunk(task):
+    """Play count games from consecutive seeds; return (kind, played, failures)"""
+    kind, first_seed, count = task
+    failures = []
+    for seed in range(first_seed, first_seed + count):
+        try:
+            play(kind, seed)
+        except Exception as error:
+            failures.append((seed, f"{type(error).__name__}: {error}"))
+    return kind, count, failures
+
+
+def profile():
+    """One chunk of each kind in this process, under cProfile"""
+    init_worker()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for kind in GAMES:
+        play_chunk((kind, 0, CHUNK[kind]))
+    profiler.disable()
+    pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+
+
+def main():
+    if sys.argv[1:] == ['profile']:
+        profile()
+        return
+    print(f"{WORKERS} worker processes")
+    print(f"{'game':>8}{'games':>10}{'seconds':>10}{'games/min':>14}{'failures':>10}")
+    with multiprocessing.Pool(WORKERS, initializer=init_worker) as pool:
+        for kind, total in GAMES.items():
+            tasks = [(kind, seed, min(CHUNK[kind], total - seed)) for seed in range(0, total, CHUNK[kind])]
+            start = time.perf_counter()
+            played = 0
+            failures = []
+            for _, count, failed in pool.imap_unordered(play_chunk, tasks):
+                played += count
+                failures += failed
+            seconds = time.perf_counter() - start
+            print(f"{kind:>8}{played:>10}{seconds:>10.1f}{played / seconds * 60:>14,.0f}{len(failures):>10}")
+            for seed, error in sorted(failures)[:MAX_FAILURES]:
+                print(f"          play({kind!r}, {seed}): {error}")
+
+
+if __name__ == "__main__":
+    main()
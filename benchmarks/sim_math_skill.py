@@ -0,0 +1,75 @@
+"""Replay synthetic learners through the math skill model
+
+Each learner has a true ability per operation and answers like the model
+assumes (right with chance 1 / (1 + e^(difficulty - ability))).  Problems
+are picked by the real bank, deck and pick rule.  For every operation and
+starting ability the simulator reports how many answers it takes the
+rating to first come within CLOSE of the true ability, how far off it is
+on average once settled, and the share of answers the learner got right
+once settled, which should sit near the 80% target where the bank has
+problems hard and easy enough.  Learners who keep improving as
+they play are run too, to check the rating keeps up.
+
+Run from the repository root:
+
+    python -m benchmarks.sim_math_skill
+"""
+import random
+import statistics
+
+from math_problems import ProblemBank, ProblemDeck
+from math_skill import OPERATIONS, TARGET_SUCCESS, SkillModel, success_probability
+
+LEARNERS = 200
+ANSWERS = 150
+# Answers that count as settled when measuring the success rate
+SETTLED_AFTER = 40
+# Rating error counted as converged
+CLOSE = 0.5
+ABILITIES = [1.0, 2.5, 4.0, 5.5]
+# Ability a growing learner gains per answer
+GROWTH = 0.02
+
+
+def run_learner(bank, operation, ability, growth, rng):
+    """(answers until close, settled mean error, settled success rate) for one learner"""
+    model = SkillModel()
+    deck = ProblemDeck(bank, rng)
+    converged = None
+    right = asked = 0
+    errors = []
+    for answer in range(1, ANSWERS + 1):
+        band = bank.band(operation, model.target_difficulty(operation))
+        _, _, difficulty = deck.draw(operation, band)
+        correct = rng.random() < success_probability(ability, difficulty)
+        model.update(operation, difficulty, correct)
+        ability += growth
+        error = abs(model.ratings[operation] - ability)
+        if converged is None and error < CLOSE:
+            converged = answer
+        if answer > SETTLED_AFTER:
+            right += correct
+            asked += 1
+            errors.append(error)
+    return converged, statistics.mean(errors), right / asked
+
+
+def main():
+    rng = random.Random(1)
+    bank = ProblemBank()
+    print(f"target success {TARGET_SUCCESS:.0%}, {LEARNERS} learners x {ANSWERS} answers each")
+    print(f"{'op':>3}{'ability':>9}{'growth':>8}{'converged':>11}{'median at':>11}{'error':>11}{'success':>9}")
+    for operation in OPERATIONS:
+        for ability in ABILITIES:
+            for growth in (0.0, GROWTH):
+                runs = [run_learner(bank, operation, ability, growth, rng) for _ in range(LEARNERS)]
+                converged = [answers for answers, _, _ in runs if answers is not None]
+                median = f"{statistics.median(converged):.0f}" if converged else "-"
+                error = statistics.mean(error for _, error, _ in runs)
+                success = statistics.mean(rate for _, _, rate in runs)
+                print(f"{operation:>3}{ability:>9.1f}{growth:>8.2f}{len(converged) / LEARNERS:>11.0%}"
+                      f"{median:>11}{error:>11.2f}{success:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Hammer one user store from many writer processes and check nothing is lost
+
+Every worker process increments a counter on a shared user and on its own
+user many times.  Afterwards the shared counter must equal the total number
+of increments.  A second round kills some workers with SIGKILL part way
+through and checks that the store still opens cleanly afterwards.  Both
+rounds run again with the workers' changes buffered by a write-behind
+store (a killed worker loses its unflushed changes, but never anyone
+else's).
+
+Run from the repository root:
+
+    python -m benchmarks.stress_user_store
+"""
+import multiprocessing
+import os
+import random
+import signal
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_user_store import make_user
+from user_store import open_user_store
+
+WORKERS = 8
+UPDATES = 250
+# Flush intervals tried: writing straight through, and buffered like the app
+FLUSH_MS = [0, 50]
+
+
+def increment(record):
+    """Bump the games-played counter of a user record"""
+    record['total_games_played'] += 1
+
+
+def worker(backend, db_path, json_path, name, updates, flush_ms):
+    """Increment the shared and own counters, one update at a time"""
+    store = open_user_store(backend, db_path, json_path, flush_ms=flush_ms)
+    # Small journal threshold so compactions happen during the run
+    inner = getattr(store, 'inner', store)
+    if hasattr(inner, 'compact_threshold'):
+        inner.compact_threshold = 16 * 1024
+    for _ in range(updates):
+        store.update('shared', increment)
+        store.update(name, increment)
+    # Worker processes exit without running atexit, so flush here
+    if flush_ms:
+        store.close()
+
+
+def open_fresh(backend, tmp):
+    """Create a store with the shared user and one user per worker"""
+    db_path = os.path.join(tmp, 'users.db')
+    json_path = os.path.join(tmp, 'users.json')
+    store = open_user_store(backend, db_path, json_path)
+    store.create('shared', make_user(0))
+    for i in range(WORKERS):
+        store.create(f"worker{i}", make_user(i))
+    return db_path, json_path
+
+
+def run_round(backend, kill, flush_ms):
+    """Run one round of workers; return a list of problems found"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, json_path = open_fresh(backend, tmp)
+        processes = [
+            multiprocessing.Process(target=worker, args=(backend, db_path, json_path, f"worker{i}", UPDATES, flush_ms))
+            for i in range(WORKERS)
+        ]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        killed = set()
+        if kill:
+            time.sleep(0.2)
+            for i in random.sample(range(WORKERS), WORKERS // 2):
+                os.kill(processes[i].pid, signal.SIGKILL)
+                killed.add(i)
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        store = open_user_store(backend, db_path, json_path)
+        problems = []
+        per_worker = [store.get(f"worker{i}")['total_games_played'] for i in range(WORKERS)]
+        for i, count in enumerate(per_worker):
+            if i not in killed and count != UPDATES:
+                problems.append(f"worker{i} has {count} updates, expected {UPDATES}")
+        shared = store.get('shared')['total_games_played']
+        # A killed worker may die between its shared and its own update
+        if kill:
+            if not sum(per_worker) <= shared <= sum(per_worker) + len(killed):
+                problems.append(f"shared counter {shared} does not match worker counters {sum(per_worker)}")
+        elif shared != WORKERS * UPDATES:
+            problems.append(f"shared counter is {shared}, expected {WORKERS * UPDATES}")
+        label = ('with kills' if kill else 'clean') + (f", flush {flush_ms} ms" if flush_ms else "")
+        print(f"{backend:>8} {label:>22}: {WORKERS} workers, {sum(per_worker) * 2} updates in {elapsed:.2f}s")
+        return problems
+
+
+def main():
+    problems = []
+    for backend in ['journal', 'sqlite']:
+        for flush_ms in FLUSH_MS:
+            problems += run_round(backend, kill=False, flush_ms=flush_ms)
+            problems += run_round(backend, kill=True, flush_ms=flush_ms)
+    for problem in problems:
+        print(f"LOST UPDATE: {problem}")
+    if problems:
+        sys.exit(1)
+    print("No updates lost")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import threading
+from collections import OrderedDict
+
+# Rendered canvases and rows kept per process
+RENDER_CACHE_SIZE = 256
+ROW_CACHE_SIZE = 4096
+
+
+class LRUCache:
+    """Small thread-safe mapping that drops the least recently used entry"""
+
+    def __init__(self, size):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Cached value for key, or None"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """Cache value under key, evicting the oldest entries past the size"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+class CanvasRenderer:
+    """HTML table rendering of canvases, memoized by canvas content
+
+    Whole tables are cached by content hash.  On a miss each row is looked up
+    by its bytes and the colors they refer to, so a canvas with one changed
+    pixel renders only that row again.
+    """
+
+    def __init__(self, cell_px, border, size=RENDER_CACHE_SIZE, row_size=ROW_CACHE_SIZE):
+        self.cell_px = cell_px
+        self.border = border
+        self.hits = 0
+        self.misses = 0
+        self._tables = LRUCache(size)
+        self._rows = LRUCache(row_size)
+
+    def cached(self, key):
+        """HTML for the canvas with this content hash if it is cached, else None"""
+        html = self._tables.get(key)
+        if html is not None:
+            self.hits += 1
+        return html
+
+    def render(self, canvas, key=None):
+        """HTML table for canvas; key is its content hash if already known"""
+        key = key or canvas.content_hash()
+        html = self._tables.get(key)
+        if html is not None:
+            self.hits += 1
+            return html
+        self.misses += 1
+        size = canvas.size
+        pixels = canvas.pixels
+        palette = canvas.palette
+        rows = []
+        for start in range(0, size * size, size):
+            row = bytes(pixels[start:start + size])
+            colors = tuple(palette[index] for index in sorted(set(row)))
+            row_key = (row, colors)
+            row_html = self._rows.get(row_key)
+            if row_html is None:
+                row_html = self._render_row(palette[index] for index in row)
+                self._rows.put(row_key, row_html)
+            rows.append(row_html)
+        html = f'<table style="border-collapse: collapse;">{"".join(rows)}</table>'
+        self._tables.put(key, html)
+        return html
+
+    def _render_row(self, colors):
+        """One <tr> of cells in the given colors"""
+        cell = f'width: {self.cell_px}px; height: {self.cell_px}px; border: 1px solid {self.border};'
+        return '<tr>' + ''.join(f'<td style="{cell} background-color: {color};"></td>' for color in colors) + '</tr>'
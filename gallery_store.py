@@ -0,0 +1,105 @@
+import sqlite3
+import threading
+import time
+
+from paint_canvas import Canvas
+
+
+class GalleryStore:
+    """Saved artworks for every user, kept in a SQLite database in WAL mode
+
+    Pictures are content-addressed: each distinct canvas is stored once as a
+    PNG under its content hash, and artworks refer to it by hash, so saving
+    the same picture again (or loading one and saving it under a new name)
+    costs one small row.  Listing a page of artworks never reads any PNGs;
+    they are fetched one by one as they are shown.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS pictures (hash TEXT PRIMARY KEY, size INTEGER NOT NULL, png BLOB NOT NULL) '
+            'WITHOUT ROWID'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS artworks ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL, name TEXT NOT NULL, '
+            'artist TEXT NOT NULL, hash TEXT NOT NULL REFERENCES pictures(hash), created REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS artworks_by_user ON artworks (username, id)')
+        # Paint event logs for replaying how an artwork was drawn
+        self._conn.execute('CREATE TABLE IF NOT EXISTS artwork_events (artwork_id INTEGER PRIMARY KEY, events BLOB NOT NULL)')
+
+    def save(self, username, name, artist, canvas, canvas_hash=None, events=None):
+        """Add an artwork to a user's gallery and return its id
+
+        events is the encoded paint event log the artwork was drawn with, if any.
+        """
+        canvas_hash = canvas_hash or canvas.content_hash()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                exists = self._conn.execute('SELECT 1 FROM pictures WHERE hash = ?', (canvas_hash,)).fetchone()
+                if exists is None:
+                    self._conn.execute('INSERT INTO pictures (hash, size, png) VALUES (?, ?, ?)',
+                                       (canvas_hash, canvas.size, canvas.to_png()))
+                cursor = self._conn.execute(
+                    'INSERT INTO artworks (username, name, artist, hash, created) VALUES (?, ?, ?, ?, ?)',
+                    (username, name, artist, canvas_hash, time.time())
+                )
+                if events is not None:
+                    self._conn.execute('INSERT INTO artwork_events (artwork_id, events) VALUES (?, ?)',
+                                       (cursor.lastrowid, events))
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+        return cursor.lastrowid
+
+    def count(self, username):
+        """Number of artworks in a user's gallery"""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM artworks WHERE username = ?', (username,)).fetchone()[0]
+
+    def page(self, username, page, page_size):
+        """One page of a user's artworks, newest first, without their pictures
+
+        Each artwork is a dict with id, name, artist, hash, size, created and
+        has_events (whether its paint event log was saved).
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT a.id, a.name, a.artist, a.hash, p.size, a.created, e.artwork_id IS NOT NULL '
+                'FROM artworks a JOIN pictures p ON p.hash = a.hash '
+                'LEFT JOIN artwork_events e ON e.artwork_id = a.id '
+                'WHERE a.username = ? ORDER BY a.id DESC LIMIT ? OFFSET ?',
+                (username, page_size, page * page_size)
+            ).fetchall()
+        columns = ('id', 'name', 'artist', 'hash', 'size', 'created', 'has_events')
+        return [dict(zip(columns, row)) for row in rows]
+
+    def events(self, artwork_id):
+        """The encoded paint event log saved with an artwork, or None"""
+        with self._lock:
+            row = self._conn.execute('SELECT events FROM artwork_events WHERE artwork_id = ?', (artwork_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def png(self, canvas_hash):
+        """The stored PNG of a picture, or None"""
+        with self._lock:
+            row = self._conn.execute('SELECT png FROM pictures WHERE hash = ?', (canvas_hash,)).fetchone()
+        return None if row is None else row[0]
+
+    def canvas(self, canvas_hash):
+        """A picture decoded back into a Canvas, or None"""
+        png = self.png(canvas_hash)
+        return None if png is None else Canvas.from_png(png)
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,290 @@
+import random
+import time
+from collections import deque
+
+from math_problems import ProblemDeck
+from math_skill import SkillModel, pick_problem
+from memory_board import MemoryBoard
+from paint_canvas import Canvas
+from paint_events import EventLog, apply_event
+from paint_history import CanvasHistory
+
+# Problems drawn ahead of time, so answering only takes the next one off the queue
+MATH_PREFETCH = 3
+# Questions built ahead of time, for the same reason
+SHAPE_PREFETCH = 3
+
+# The games here know nothing about Streamlit: Momo.py keeps one in session
+# state and draws it, and benchmarks/sim_games.py plays them by the million.
+# Each keeps its state in __slots__ and round-trips through to_dict() and
+# from_dict(); shared read-only objects (the problem bank, the shape
+# registry) and random number generators are passed in, never serialized.
+
+
+class MemoryGame:
+    """One memory game: a board plus when it was started and finished"""
+
+    __slots__ = ('board', 'started', 'finished')
+
+    def __init__(self, rows, cols, seed, started=None):
+        self.board = MemoryBoard(rows, cols, seed)
+        self.started = time.time() if started is None else started
+        self.finished = None
+
+    def play(self, first, second, now=None):
+        """Turn up two cards; return whether they match, None if the move is not allowed"""
+        result = self.board.play(first, second)
+        if result and self.board.completed:
+            self.finished = time.time() if now is None else now
+        return result
+
+    def seconds(self, now=None):
+        """Whole seconds played so far, or to the finish once the board is done"""
+        end = self.finished
+        if end is None:
+            end = time.time() if now is None else now
+        return int(end - self.started)
+
+    def to_dict(self):
+        """Serializable state; the cards are dealt again from the seed"""
+        board = self.board
+        return {'rows': board.rows, 'cols': board.cols, 'seed': board.seed, 'matched': board.matched,
+                'moves': board.moves, 'pairs_found': board.pairs_found,
+                'started': self.started, 'finished': self.finished}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a game from to_dict()"""
+        game = cls(data['rows'], data['cols'], data['seed'], started=data['started'])
+        game.board.matched = data['matched']
+        game.board.moves = data['moves']
+        game.board.pairs_found = data['pairs_found']
+        game.finished = data['finished']
+        return game
+
+
+class MathGame:
+    """One math game: score, streak and problems picked for the player's skill
+
+    The current problem is ``problem``, a (question, answer, difficulty)
+    tuple.  check() scores an answer and updates the skill model; next_problem()
+    moves on, preferring problems drawn earlier by prefetch() while they
+    still suit the player's ratings.
+    """
+
+    __slots__ = ('skill', 'deck', 'rng', 'score', 'answered', 'streak', 'level',
+                 'operation', 'problem', 'upcoming')
+
+    def __init__(self, bank, skill=None, deck=None, rng=random):
+        self.skill = SkillModel() if skill is None else skill
+        # The deck can outlive a game, so a new game does not bring old problems straight back
+        self.deck = ProblemDeck(bank, rng) if deck is None else deck
+        self.rng = rng
+        self.score = 0
+        self.answered = 0
+        self.streak = 0
+        self.level = self.skill.level()
+        self.upcoming = deque()
+        self.operation = self.problem = None
+        self.next_problem()
+
+    @property
+    def question(self):
+        """The current problem as shown, like 7 + 5"""
+        return self.problem[0]
+
+    @property
+    def answer(self):
+        """The current problem's answer"""
+        return self.problem[1]
+
+    @property
+    def difficulty(self):
+        """The current problem's difficulty on the skill model's scale"""
+        return self.problem[2]
+
+    def on_target(self, operation, band):
+        """Whether a problem drawn earlier still suits the player's current ratings"""
+        if operation not in self.skill.operations():
+            return False
+        target = self.deck.bank.band(operation, self.skill.target_difficulty(operation))
+        return abs(band - target) <= 1
+
+    def next_problem(self):
+        """Move on to the next problem, picked for the player's skill"""
+        problem = None
+        while self.upcoming and problem is None:
+            operation, band, queued = self.upcoming.popleft()
+            # Answers since it was drawn may have moved the ratings away from it
+            if self.on_target(operation, band):
+                problem = queued
+        if problem is None:
+            operation, band = pick_problem(self.skill, self.deck, self.rng)
+            problem = self.deck.draw(operation, band)
+        self.operation, self.problem = operation, problem
+
+    def prefetch(self, count=MATH_PREFETCH):
+        """Draw the next few problems ahead of time"""
+        while len(self.upcoming) < count:
+            operation, band = pick_problem(self.skill, self.deck, self.rng)
+            self.upcoming.append((operation, band, self.deck.draw(operation, band)))
+
+    def check(self, value):
+        """Score an answer to the current problem and rate it; return whether it was right"""
+        correct = value == self.answer
+        self.answered += 1
+        if correct:
+            self.score += 1
+            self.streak += 1
+        else:
+            self.streak = 0
+        self.skill.update(self.operation, self.difficulty, correct)
+        return correct
+
+    def skip(self):
+        """Give up on the current problem, which ends the streak"""
+        self.streak = 0
+        self.next_problem()
+
+    def update_level(self):
+        """Work the level out again from the skill model; return whether it went up"""
+        level = self.skill.level()
+        leveled_up = level > self.level
+        self.level = level
+        return leveled_up
+
+    def to_dict(self):
+        """Serializable state, skill model and deck included"""
+        return {'skill': self.skill.to_dict(), 'deck': self.deck.to_dict(), 'score': self.score,
+                'answered': self.answered, 'streak': self.streak, 'level': self.level,
+                'operation': self.operation, 'problem': list(self.problem),
+                'upcoming': [[operation, band, list(problem)] for operation, band, problem in self.upcoming]}
+
+    @classmethod
+    def from_dict(cls, data, bank, rng=random):
+        """Rebuild a game from to_dict() around the process's problem bank"""
+        game = cls.__new__(cls)
+        game.skill = SkillModel(data['skill'])
+        game.deck = ProblemDeck.from_dict(data['deck'], bank, rng)
+        game.rng = rng
+        game.score = data['score']
+        game.answered = data['answered']
+        game.streak = data['streak']
+        game.level = data['level']
+        game.operation = data['operation']
+        game.problem = tuple(data['problem'])
+        game.upcoming = deque((operation, band, tuple(problem)) for operation, band, problem in data['upcoming'])
+        return game
+
+
+class ShapeGame:
+    """One shape quiz: score, streak and the questions, built by the shape registry
+
+    The current question is ``question``, a dict from
+    ShapeRegistry.question(); it is built once, so every rerun shows the same
+    shape and options in the same order.
+    """
+
+    __slots__ = ('registry', 'rng', 'score', 'answered', 'streak', 'question', 'upcoming')
+
+    def __init__(self, registry, rng=random):
+        self.registry = registry
+        self.rng = rng
+        self.score = 0
+        self.answered = 0
+        self.streak = 0
+        self.upcoming = deque()
+        self.question = None
+        self.next_question()
+
+    @property
+    def shape(self):
+        """Name of the shape the current question shows"""
+        return self.question['shape']
+
+    def next_question(self):
+        """Move on to the next question, taking it off the prebuilt queue"""
+        if self.upcoming:
+            self.question = self.upcoming.popleft()
+        else:
+            self.question = self.registry.question(self.rng, avoid=self.question and self.shape)
+
+    def prefetch(self, count=SHAPE_PREFETCH):
+        """Build the next few questions ahead of time"""
+        while len(self.upcoming) < count:
+            last = self.upcoming[-1] if self.upcoming else self.question
+            self.upcoming.append(self.registry.question(self.rng, avoid=last['shape']))
+
+    def check(self, option):
+        """Score a chosen option; return whether it names the shape"""
+        correct = option == self.shape
+        self.answered += 1
+        if correct:
+            self.score += 1
+            self.streak += 1
+        else:
+            self.streak = 0
+        return correct
+
+    @property
+    def accuracy(self):
+        """Share of answers that were right, 0 before the first one"""
+        return self.score / max(1, self.answered)
+
+    def to_dict(self):
+        """Serializable state"""
+        return {'score': self.score, 'answered': self.answered, 'streak': self.streak,
+                'question': self.question, 'upcoming': list(self.upcoming)}
+
+    @classmethod
+    def from_dict(cls, data, registry, rng=random):
+        """Rebuild a game from to_dict() around the process's shape registry"""
+        game = cls.__new__(cls)
+        game.registry = registry
+        game.rng = rng
+        game.score = data['score']
+        game.answered = data['answered']
+        game.streak = data['streak']
+        game.question = data['question']
+        game.upcoming = deque(data['upcoming'])
+        return game
+
+
+class PaintGame:
+    """One paint studio session: the canvas, its undo history and its event log
+
+    Every change goes through apply(), so the log always replays to the
+    canvas; to_dict() is just the log, and from_dict() replays it.
+    """
+
+    __slots__ = ('canvas', 'history', 'events')
+
+    def __init__(self, size):
+        self.canvas = Canvas(size)
+        self.history = CanvasHistory()
+        # Everything drawn from here on, for timelapses of saved artworks
+        self.events = EventLog([['n', size]])
+
+    def apply(self, event, load=None):
+        """Apply a paint event as one undo step and log it for replay
+
+        load(hash) returns the Canvas of a gallery artwork, for 'l' events.
+        """
+        changed = apply_event(self.canvas, self.history, event, load)
+        self.events.record(event, self.canvas, changed)
+
+    def to_dict(self):
+        """Serializable state: the events that drew the canvas"""
+        return {'events': self.events.events}
+
+    @classmethod
+    def from_dict(cls, data, load=None):
+        """Rebuild a session by replaying to_dict(), undo history and all"""
+        events = data['events']
+        game = cls(12)
+        # The first event is where the log starts, never an undo step
+        apply_event(game.canvas, CanvasHistory(), events[0], load)
+        for event in events[1:]:
+            apply_event(game.canvas, game.history, event, load)
+        game.events = EventLog(events)
+        return game
@@ -0,0 +1,207 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+# Players kept per board; more than are shown so a player dropping out
+# of the visible top still leaves others ranked behind them
+LEADERBOARD_CAPACITY = 50
+# Answers needed before a player shows up on an accuracy board
+MIN_QUESTIONS_FOR_ACCURACY = 10
+# Key the boards are saved under in the user store
+LEADERBOARDS_META_KEY = 'leaderboards'
+# Changed entries are saved, and boards saved by other processes picked up,
+# at most this often
+SAVE_SECONDS = 30
+
+# name -> (game, stat, higher_is_better, title)
+BOARDS = {
+    'memory_moves': ('memory', 'best_moves', False, "🧩 Fewest Memory Moves"),
+    'memory_time': ('memory', 'best_time', False, "⏱️ Fastest Memory Match"),
+    'math_streak': ('math', 'best_streak', True, "🔥 Math Best Streak"),
+    'math_accuracy': ('math', 'accuracy', True, "🧮 Math Accuracy"),
+    'shapes_streak': ('shapes', 'best_streak', True, "🔥 Shapes Best Streak"),
+    'shapes_accuracy': ('shapes', 'accuracy', True, "📐 Shapes Accuracy"),
+    'paint_artworks': ('paint', 'artworks_created', True, "🎨 Most Artworks"),
+}
+
+
+class Leaderboard:
+    """Best players for one stat, kept sorted for O(log n) updates
+
+    Entries are ordered by a sort key of ``(score, username)`` where score is
+    negated when higher values are better, so the best player is always first.
+    """
+
+    def __init__(self, higher_is_better, capacity=LEADERBOARD_CAPACITY):
+        self.higher_is_better = higher_is_better
+        self.capacity = capacity
+        self._keys = []
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def offer(self, username, display_name, value):
+        """Record a player's latest value; return True if the board changed"""
+        old = self._entries.get(username)
+        if value is None:
+            if old is None:
+                return False
+            self._remove(username)
+            return True
+        key = (-value if self.higher_is_better else value, username)
+        if old is not None and old[0] == key and old[2] == display_name:
+            return False
+        if old is not None:
+            self._remove(username)
+        if len(self._keys) >= self.capacity and key > self._keys[-1]:
+            # Not good enough to make the board
+            return old is not None
+        insort(self._keys, key)
+        self._entries[username] = (key, value, display_name)
+        if len(self._keys) > self.capacity:
+            dropped = self._keys.pop()
+            del self._entries[dropped[1]]
+        return True
+
+    def top(self, n):
+        """Return the best n entries as (username, display_name, value)"""
+        return [(key[1], self._entries[key[1]][2], self._entries[key[1]][1]) for key in self._keys[:n]]
+
+    def to_list(self):
+        """Serializable form of the board, best first"""
+        return [list(entry) for entry in self.top(len(self._keys))]
+
+    def load_list(self, entries):
+        """Replace the board with entries from to_list()"""
+        self._keys = []
+        self._entries = {}
+        for username, display_name, value in entries:
+            self.offer(username, display_name, value)
+
+    def _remove(self, username):
+        """Take a player off the board"""
+        key = self._entries.pop(username)[0]
+        del self._keys[bisect_left(self._keys, key)]
+
+
+class Leaderboards:
+    """All per-game leaderboards, shared by every session in the process
+
+    Entries that changed since the last save are kept aside, and save()
+    merges just those into the boards in the store under the store's
+    write lock, then picks up what other server processes saved; with
+    nothing to save it just reloads the stored boards.  So processes never
+    overwrite each other's entries, and the boards are read and written at
+    most every ``save_seconds`` rather than on every answer.
+    """
+
+    def __init__(self, save_seconds=SAVE_SECONDS):
+        self._lock = threading.Lock()
+        self.boards = {name: Leaderboard(spec[2]) for name, spec in BOARDS.items()}
+        self.save_seconds = save_seconds
+        # name: {username: (display_name, value)} offered since the last save
+        self._dirty = {}
+        self._saved_at = time.monotonic()
+
+    def offer_record(self, username, record):
+        """Update every board from a user's record; return True if any changed"""
+        changed = False
+        with self._lock:
+            for name, (game, stat, _, _) in BOARDS.items():
+                value = board_value(record['game_stats'].get(game, {}), stat)
+                if self.boards[name].offer(username, record['display_name'], value):
+                    self._dirty.setdefault(name, {})[username] = (record['display_name'], value)
+                    changed = True
+        return changed
+
+    def save(self, store, force=False):
+        """Merge the entries changed since the last save into the stored boards
+
+        Then reload the boards from the store, entries other processes saved
+        included.  Does nothing until ``save_seconds`` have passed since the
+        last save, unless force is set.  Returns True if anything was written.
+        """
+        with self._lock:
+            if not force and time.monotonic() - self._saved_at < self.save_seconds:
+                return False
+            dirty, self._dirty = self._dirty, {}
+            self._saved_at = time.monotonic()
+        if not dirty:
+            self._load_saved(store.get_meta(LEADERBOARDS_META_KEY) or {})
+            return False
+
+        def merge(saved):
+            merged = Leaderboards.from_dict(saved or {})
+            merged._offer_entries(dirty)
+            return merged.to_dict()
+
+        try:
+            saved = store.update_meta(LEADERBOARDS_META_KEY, merge)
+        except Exception:
+            with self._lock:
+                for name, entries in dirty.items():
+                    # Offers made since win over the ones that failed to save
+                    self._dirty[name] = {**entries, **self._dirty.get(name, {})}
+            raise
+        self._load_saved(saved)
+        return True
+
+    def _load_saved(self, saved):
+        """Replace the boards with saved ones, keeping offers not saved yet"""
+        with self._lock:
+            for name, entries in saved.items():
+                if name in self.boards:
+                    self.boards[name].load_list(entries)
+            # Offers made while saving are not in the store yet
+            self._offer_entries(self._dirty)
+
+    def _offer_entries(self, entries):
+        """Offer {name: {username: (display_name, value)}} to the boards"""
+        for name, players in entries.items():
+            if name in self.boards:
+                for username, (display_name, value) in players.items():
+                    self.boards[name].offer(username, display_name, value)
+
+    def top(self, name, n):
+        """Return the best n entries of one board"""
+        with self._lock:
+            return self.boards[name].top(n)
+
+    def to_dict(self):
+        """Serializable form of all boards"""
+        with self._lock:
+            return {name: board.to_list() for name, board in self.boards.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild boards saved with to_dict()"""
+        leaderboards = cls()
+        for name, entries in data.items():
+            if name in leaderboards.boards:
+                leaderboards.boards[name].load_list(entries)
+        return leaderboards
+
+    @classmethod
+    def rebuild(cls, store):
+        """Build boards by scanning every user in the store (done once)"""
+        leaderboards = cls()
+        for username in store.usernames():
+            record = store.get(username)
+            if record is not None:
+                leaderboards.offer_record(username, record)
+        return leaderboards
+
+
+def board_value(stats, stat):
+    """The value a player is ranked by for one stat, or None if unranked"""
+    if stat == 'accuracy':
+        answered = stats.get('questions_answered', 0)
+        if answered < MIN_QUESTIONS_FOR_ACCURACY:
+            return None
+        return round(stats.get('correct_answers', 0) / answered * 100, 1)
+    value = stats.get(stat)
+    if not value:
+        # Zero streaks and artworks are not worth ranking
+        return None
+    return value
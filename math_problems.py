@@ -0,0 +1,129 @@
+import bisect
+import random
+
+# Biggest operand of each operation; multiplication stops at the 12 times table
+OPERAND_LIMITS = {'+': 20, '-': 20, '×': 12, '÷': 12}
+# Problems of similar difficulty dealt together; a band never repeats a problem
+# until all of its problems have come up
+BAND_SIZE = 12
+
+
+def problem_difficulty(operation, a, b):
+    """Rough difficulty of a problem on the skill model's logit scale
+
+    Bigger numbers are harder, carrying and borrowing add a step, and the
+    1, 2 and 10 times tables are easier than the rest.  0 is the easiest
+    problem; the hardest are around 6.
+    """
+    if operation == '+':
+        return (a + b) / 8 + (a % 10 + b % 10 >= 10)
+    if operation == '-':
+        return a / 8 + (a % 10 < b % 10)
+    # Division by a asks for the other factor: a times table backwards
+    easy = min(a, b) in (1, 2, 10)
+    difficulty = (0.1 if easy else 0.3) * min(a, b) + a * b / 50
+    return difficulty + 0.5 if operation == '÷' else difficulty
+
+
+def make_problems(operation, limit):
+    """Every distinct problem of one operation with operands from 1 to limit
+
+    Problems are (question, answer, difficulty) tuples.  Subtractions never
+    go below zero and divisions always come out even.
+    """
+    problems = {}
+    for a in range(1, limit + 1):
+        for b in range(1, limit + 1):
+            if operation == '+':
+                problems[f"{a} + {b}"] = (a + b, problem_difficulty('+', a, b))
+            elif operation == '-':
+                big, small = max(a, b), min(a, b)
+                problems[f"{big} - {small}"] = (big - small, problem_difficulty('-', big, small))
+            elif operation == '×':
+                problems[f"{a} × {b}"] = (a * b, problem_difficulty('×', a, b))
+            elif operation == '÷':
+                problems[f"{a * b} ÷ {a}"] = (b, problem_difficulty('÷', a, b))
+            else:
+                raise ValueError(f"Unknown operation: {operation}")
+    return tuple((question, answer, difficulty) for question, (answer, difficulty) in problems.items())
+
+
+class ProblemBank:
+    """Every problem of every operation, built once and shared by all sessions
+
+    Each operation's problems are sorted by difficulty and cut into bands of
+    BAND_SIZE, so asking for a difficulty finds its band with one binary
+    search.  Everything is built up front; after that the bank is only read,
+    so sessions on different threads can share it.
+    """
+
+    def __init__(self, limits=OPERAND_LIMITS, band_size=BAND_SIZE):
+        self._bands = {}
+        self._band_difficulties = {}
+        for operation, limit in limits.items():
+            problems = sorted(make_problems(operation, limit), key=lambda problem: problem[2])
+            bands = [tuple(problems[start:start + band_size]) for start in range(0, len(problems), band_size)]
+            # A short last band would repeat its few problems too often
+            if len(bands) > 1 and len(bands[-1]) < band_size:
+                bands[-2] += bands.pop()
+            self._bands[operation] = bands
+            self._band_difficulties[operation] = [band[len(band) // 2][2] for band in bands]
+
+    def band(self, operation, difficulty):
+        """Index of the band whose middle problem is nearest to difficulty"""
+        middles = self._band_difficulties[operation]
+        index = bisect.bisect_left(middles, difficulty)
+        if index == len(middles) or (index > 0 and difficulty - middles[index - 1] < middles[index] - difficulty):
+            index -= 1
+        return index
+
+    def problems(self, operation, band):
+        """The problems of one band"""
+        return self._bands[operation][band]
+
+
+class ProblemDeck:
+    """Draws a player's problems from a bank without repeats
+
+    Each band is dealt out in shuffled order before any of its problems
+    comes up again, and a new round never starts with the problem the last
+    round ended on.  Only the positions left to draw are kept, so a deck is
+    small enough for session state.
+    """
+
+    __slots__ = ('bank', 'rng', '_left', '_last')
+
+    def __init__(self, bank, rng=random):
+        self.bank = bank
+        self.rng = rng
+        self._left = {}
+        self._last = {}
+
+    def draw(self, operation, band):
+        """Next (question, answer, difficulty) from one band"""
+        key = (operation, band)
+        problems = self.bank.problems(operation, band)
+        left = self._left.get(key)
+        if not left:
+            left = list(range(len(problems)))
+            self.rng.shuffle(left)
+            # Problems are drawn from the end of the list
+            if len(left) > 1 and left[-1] == self._last.get(key):
+                left[0], left[-1] = left[-1], left[0]
+            self._left[key] = left
+        index = left.pop()
+        self._last[key] = index
+        return problems[index]
+
+    def to_dict(self):
+        """Serializable state: the positions left to draw and last drawn in each band"""
+        return {'left': [[operation, band, left] for (operation, band), left in self._left.items()],
+                'last': [[operation, band, last] for (operation, band), last in self._last.items()]}
+
+    @classmethod
+    def from_dict(cls, data, bank, rng=random):
+        """Rebuild a deck from to_dict() around bank"""
+        deck = cls(bank, rng)
+        deck._left = {(operation, band): list(left) for operation, band, left in data['left']}
+        deck._last = {(operation, band): last for operation, band, last in data['last']}
+        return deck
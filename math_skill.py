@@ -0,0 +1,82 @@
+import math
+import random
+
+OPERATIONS = ['+', '-', '×', '÷']
+# Rating every operation starts at: the easiest problems come first
+INITIAL_RATING = 1.5
+# Share of answers the problems are picked to get right
+TARGET_SUCCESS = 0.8
+# Rating minus difficulty at which a player gets TARGET_SUCCESS right
+TARGET_MARGIN = math.log(TARGET_SUCCESS / (1 - TARGET_SUCCESS))
+# Rating step: big for the first answers, settling to K_MIN over K_SETTLE answers
+K_START = 2.0
+K_MIN = 0.3
+K_SETTLE = 10
+# Multiplication and division join once both adding and subtracting reach this
+UNLOCK_RATING = 3.5
+# Rating gained across all operations per level shown to the player
+LEVEL_POINTS = 2.0
+
+
+def success_probability(rating, difficulty):
+    """Chance a player with rating answers a problem of difficulty right (Rasch model)"""
+    return 1 / (1 + math.exp(difficulty - rating))
+
+
+class SkillModel:
+    """A player's rating for each math operation, Elo style
+
+    Ratings and problem difficulties share one logit scale: a player whose
+    rating is d above a problem's difficulty gets it right with chance
+    1 / (1 + e^-d).  Each answer moves the rating of its operation by
+    k * (result - expected), a constant-time update; k shrinks as the
+    operation collects answers, so ratings move fast at first and then
+    settle.  The model is kept in game_stats['math']['skill'] as
+    {operation: {'rating': r, 'answers': n}}.
+    """
+
+    __slots__ = ('ratings', 'answers')
+
+    def __init__(self, skill=None):
+        skill = skill or {}
+        self.ratings = {op: skill.get(op, {}).get('rating', INITIAL_RATING) for op in OPERATIONS}
+        self.answers = {op: skill.get(op, {}).get('answers', 0) for op in OPERATIONS}
+
+    @classmethod
+    def from_stats(cls, math_stats):
+        """The model saved in a player's math stats (a fresh one if none was)"""
+        return cls(math_stats.get('skill'))
+
+    def to_dict(self):
+        """Serializable form for game_stats['math']['skill']"""
+        return {op: {'rating': round(self.ratings[op], 4), 'answers': self.answers[op]} for op in OPERATIONS}
+
+    def operations(self):
+        """Operations the player is asked about"""
+        if min(self.ratings['+'], self.ratings['-']) >= UNLOCK_RATING:
+            return OPERATIONS
+        return OPERATIONS[:2]
+
+    def target_difficulty(self, operation):
+        """Difficulty the player gets right TARGET_SUCCESS of the time"""
+        return self.ratings[operation] - TARGET_MARGIN
+
+    def update(self, operation, difficulty, correct):
+        """Move the operation's rating after one answer; return the change"""
+        expected = success_probability(self.ratings[operation], difficulty)
+        k = max(K_MIN, K_START / (1 + self.answers[operation] / K_SETTLE))
+        change = k * (correct - expected)
+        self.ratings[operation] += change
+        self.answers[operation] += 1
+        return change
+
+    def level(self):
+        """Level shown to the player, from the rating gained over all operations"""
+        gained = sum(max(0.0, rating - INITIAL_RATING) for rating in self.ratings.values())
+        return 1 + int(gained / LEVEL_POINTS)
+
+
+def pick_problem(model, deck, rng=random):
+    """(operation, band) of the next problem for the player, aimed at TARGET_SUCCESS"""
+    operation = rng.choice(model.operations())
+    return operation, deck.bank.band(operation, model.target_difficulty(operation))
@@ -0,0 +1,84 @@
+import random
+
+import numpy as np
+
+# Card faces, the classic eight first; enough pairs for the biggest board
+MEMORY_DECK = [
+    "🐶", "🐱", "🐸", "🦋", "🌟", "🎈", "🍎", "🎯",
+    "🐵", "🦁", "🐯", "🐮", "🐷", "🐰", "🐻", "🐼",
+    "🐨", "🐔", "🐧", "🐢", "🐙", "🐬", "🐳", "🦄",
+    "🐝", "🐞", "🦀", "🦒", "🦓", "🐘", "🦔", "🦉",
+    "🍌", "🍇", "🍓", "🍒", "🍉", "🍍", "🥕", "🌽",
+    "🍩", "🍪", "🧁", "🍦", "🌈", "🌻", "🌵", "🍄",
+    "⚽", "🏀", "🚀", "🚗", "🚂", "⛵", "🎸", "🥁",
+]
+# (rows, columns) a board can have: from 2x2 to 10x10, always an even number of cards
+MEMORY_BOARD_SIZES = [(2, 2), (3, 4), (4, 4), (5, 6), (6, 6), (7, 8), (8, 8), (9, 10), (10, 10)]
+# The board the leaderboards rank
+CLASSIC_BOARD_SIZE = (4, 4)
+
+
+class MemoryBoard:
+    """One deal of the memory game, reproducible from its seed
+
+    ``cards`` holds the face number of every card (an index into ``faces``)
+    as a uint8 array, and ``matched`` is a bitset in an int, bit i set once
+    card i has been matched, so even a 10x10 board is a few hundred bytes.
+    The same rows, columns and seed always deal the same cards.
+    """
+
+    __slots__ = ('rows', 'cols', 'seed', 'faces', 'cards', 'matched', 'moves', 'pairs_found')
+
+    def __init__(self, rows, cols, seed, deck=MEMORY_DECK):
+        if (rows, cols) not in MEMORY_BOARD_SIZES:
+            raise ValueError(f"Unsupported memory board size: {rows}x{cols}")
+        pairs = rows * cols // 2
+        if pairs > len(deck):
+            raise ValueError(f"A {rows}x{cols} board needs {pairs} faces, the deck has {len(deck)}")
+        self.rows = rows
+        self.cols = cols
+        self.seed = seed
+        rng = random.Random(seed)
+        self.faces = rng.sample(deck, pairs)
+        order = list(range(rows * cols))
+        rng.shuffle(order)
+        # Card p gets face order[p] // 2, so every face lands on exactly two cards
+        self.cards = np.array(order, dtype=np.uint8) // 2
+        self.matched = 0
+        self.moves = 0
+        self.pairs_found = 0
+
+    @property
+    def size_name(self):
+        """Board size as stats and labels show it, like 4x4"""
+        return f"{self.rows}x{self.cols}"
+
+    @property
+    def completed(self):
+        """Whether every pair has been found"""
+        return self.pairs_found == len(self.faces)
+
+    def matched_list(self):
+        """Matched flag of every card, in board order"""
+        return [bool(self.matched >> index & 1) for index in range(len(self.cards))]
+
+    def play(self, first, second):
+        """Turn up two cards as one move and return whether they match
+
+        Returns None without counting a move if the move is not allowed:
+        an index off the board, the same card twice, an already matched
+        card or a finished game.
+        """
+        count = len(self.cards)
+        if type(first) is not int or type(second) is not int or not (0 <= first < count and 0 <= second < count):
+            return None
+        # One mask test finds either card already matched, which covers a finished game too
+        pair = 1 << first | 1 << second
+        if first == second or self.matched & pair:
+            return None
+        self.moves += 1
+        if self.cards[first] != self.cards[second]:
+            return False
+        self.matched |= pair
+        self.pairs_found += 1
+        return True
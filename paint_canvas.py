@@ -0,0 +1,195 @@
+import hashlib
+import io
+
+import numpy as np
+from PIL import Image
+
+WHITE = "#FFFFFF"
+RAINBOW_COLORS = ["#FF0000", "#FF7F00", "#FFFF00", "#00FF00", "#0000FF", "#4B0082", "#9400D3"]
+SPARKLE_COLORS = ["#FFD700", "#FFFF00", "#FFF8DC", "#F0E68C"]
+SPARKLE_COUNT = 20
+# One byte per pixel, so a canvas can use at most this many colors
+MAX_PALETTE_COLORS = 256
+
+
+class Canvas:
+    """Square paint canvas stored as one palette index byte per pixel
+
+    ``pixels`` is a flat NumPy uint8 array in row-major order and ``palette``
+    lists the hex colors the indices refer to, starting with white.
+    Whole-canvas tools work on the array in one go instead of touching each
+    pixel.  ``version`` goes up on every change, so anything derived from the
+    pixels (like the PNG) can be cached until the canvas changes.
+    """
+
+    def __init__(self, size, pixels=None, palette=None):
+        self.size = size
+        if pixels is None:
+            self.pixels = np.zeros(size * size, dtype=np.uint8)
+        elif isinstance(pixels, (bytes, bytearray)):
+            self.pixels = np.frombuffer(pixels, dtype=np.uint8).copy()
+        else:
+            self.pixels = np.array(pixels, dtype=np.uint8).ravel()
+        self.palette = [WHITE] if palette is None else list(palette)
+        self._palette_index = {color: index for index, color in enumerate(self.palette)}
+        self.version = 0
+        self._png = {}
+
+    def __eq__(self, other):
+        if not isinstance(other, Canvas):
+            return NotImplemented
+        return self.size == other.size and self.colors() == other.colors()
+
+    def color_index(self, color):
+        """Palette index of color, adding it to the palette if needed"""
+        index = self._palette_index.get(color)
+        if index is None:
+            if len(self.palette) >= MAX_PALETTE_COLORS:
+                self._compact_palette()
+                if len(self.palette) >= MAX_PALETTE_COLORS:
+                    raise ValueError("Canvas palette is full")
+            index = len(self.palette)
+            self.palette.append(color)
+            self._palette_index[color] = index
+        return index
+
+    def get(self, i, j):
+        """Color of the pixel at row i, column j"""
+        return self.palette[self.pixels[i * self.size + j]]
+
+    def set(self, i, j, color):
+        """Paint the pixel at row i, column j"""
+        self.pixels[i * self.size + j] = self.color_index(color)
+        self.version += 1
+
+    def paint_pixels(self, positions, color):
+        """Paint the pixels at the given row-major positions with one color"""
+        self.pixels[np.asarray(positions, dtype=np.intp)] = self.color_index(color)
+        self.version += 1
+
+    def paint_mask(self, mask, color):
+        """Paint every pixel where the size x size boolean mask is True"""
+        self.grid()[mask] = self.color_index(color)
+        self.version += 1
+
+    def restore_pixels(self, positions, indices, palette):
+        """Put back palette indices at row-major positions (used by undo)
+
+        palette is the one the indices were recorded with; it replaces the
+        canvas palette unless that already starts with it.
+        """
+        if self.palette[:len(palette)] != palette:
+            self.palette = list(palette)
+            self._palette_index = {color: index for index, color in enumerate(self.palette)}
+        self.pixels[positions] = indices
+        self.version += 1
+
+    def restore(self, size, pixels, palette):
+        """Replace the whole canvas with the given size, pixels and palette"""
+        self.size = size
+        self.pixels = pixels.copy()
+        self.palette = list(palette)
+        self._palette_index = {color: index for index, color in enumerate(self.palette)}
+        self.version += 1
+
+    def grid(self):
+        """The pixels as a size x size array view (rows first)"""
+        return self.pixels.reshape(self.size, self.size)
+
+    def colors(self):
+        """Hex color of every pixel, row by row"""
+        palette = self.palette
+        return [palette[index] for index in self.pixels.tolist()]
+
+    def clear(self):
+        """Paint every pixel white"""
+        self.fill(WHITE)
+
+    def fill(self, color):
+        """Paint every pixel with one color"""
+        self.pixels.fill(self.color_index(color))
+        self.version += 1
+
+    def rainbow_fill(self, colors=RAINBOW_COLORS, rng=None):
+        """Paint every pixel with a random color from colors
+
+        rng is a NumPy Generator; pass a seeded one to get the same picture again.
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        indices = np.array([self.color_index(color) for color in colors], dtype=np.uint8)
+        self.pixels[:] = indices[rng.integers(len(indices), size=self.pixels.size)]
+        self.version += 1
+
+    def sparkle(self, colors=SPARKLE_COLORS, count=SPARKLE_COUNT, rng=None):
+        """Paint count random pixels with random sparkle colors, drawn like rainbow_fill()"""
+        rng = np.random.default_rng() if rng is None else rng
+        indices = np.array([self.color_index(color) for color in colors], dtype=np.uint8)
+        self.pixels[rng.integers(self.pixels.size, size=count)] = indices[rng.integers(len(indices), size=count)]
+        self.version += 1
+
+    def copy(self):
+        """An independent copy of the canvas, sharing already encoded PNGs"""
+        canvas = Canvas.__new__(Canvas)
+        canvas.size = self.size
+        canvas.pixels = self.pixels.copy()
+        canvas.palette = self.palette[:]
+        canvas._palette_index = self._palette_index.copy()
+        canvas.version = self.version
+        canvas._png = self._png.copy()
+        return canvas
+
+    def content_hash(self):
+        """Digest of what the canvas looks like
+
+        Palette indices are renumbered by color first, so canvases that are
+        equal hash the same however their palettes were built up.
+        """
+        palette = self.palette
+        used = sorted(self._used_indices(), key=palette.__getitem__)
+        remap = np.zeros(MAX_PALETTE_COLORS, dtype=np.uint8)
+        remap[used] = np.arange(len(used))
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.size.to_bytes(4, 'big'))
+        digest.update(','.join(palette[index] for index in used).encode())
+        digest.update(remap[self.pixels].tobytes())
+        return digest.hexdigest()
+
+    def to_png(self, scale=1):
+        """The canvas as a palette PNG, each pixel scale x scale image pixels
+
+        Encoded once per canvas version and scale.
+        """
+        cached = self._png.get(scale)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        image = Image.frombytes('P', (self.size, self.size), self.pixels.tobytes())
+        image.putpalette(b''.join(bytes.fromhex(color[1:]) for color in self.palette))
+        if scale > 1:
+            image = image.resize((self.size * scale, self.size * scale), Image.NEAREST)
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        png = buffer.getvalue()
+        self._png[scale] = (self.version, png)
+        return png
+
+    @classmethod
+    def from_png(cls, png):
+        """Build a canvas from a PNG made by to_png() at scale 1"""
+        image = Image.open(io.BytesIO(png))
+        rgb = image.getpalette()
+        palette = [f"#{rgb[k]:02X}{rgb[k + 1]:02X}{rgb[k + 2]:02X}" for k in range(0, len(rgb), 3)]
+        return cls(image.size[0], np.asarray(image, dtype=np.uint8), palette)
+
+    def _compact_palette(self):
+        """Drop palette colors no pixel uses any more"""
+        used = sorted(set(self._used_indices()) | {0})
+        remap = np.zeros(MAX_PALETTE_COLORS, dtype=np.uint8)
+        remap[used] = np.arange(len(used))
+        self.pixels = remap[self.pixels]
+        self.palette = [self.palette[index] for index in used]
+        self._palette_index = {color: index for index, color in enumerate(self.palette)}
+        self.version += 1
+
+    def _used_indices(self):
+        """Palette indices at least one pixel uses"""
+        return np.flatnonzero(np.bincount(self.pixels, minlength=MAX_PALETTE_COLORS)).tolist()
@@ -0,0 +1,170 @@
+import base64
+import json
+import random
+import zlib
+
+import numpy as np
+
+from paint_canvas import Canvas
+from paint_history import CanvasHistory
+from paint_tools import apply_tool, paint_brush
+
+# Encoded size of the log, in bytes, past which it is folded into a snapshot of the canvas
+EVENT_LOG_BUDGET_BYTES = 256 * 1024
+
+# Events are short lists, first item the kind:
+#   ['n', size]                                   new blank canvas
+#   ['b', color, symmetry, positions]             brush stroke (row-major positions, in the log
+#                                                 as base64 of little-endian uint16s)
+#   ['t', tool, color, symmetry, start, end]      line, box, circle or fill tool
+#   ['f', color] / ['c']                          fill all / clear
+#   ['r', seed] / ['s', seed]                     rainbow fill / sparkle from a seeded RNG
+#   ['l', hash]                                   artwork loaded from the gallery
+#   ['p', png]                                    whole canvas as a base64 PNG
+#   ['u'] / ['d']                                 undo / redo
+
+
+class EventLog:
+    """Every paint action on a canvas, in order, so the drawing can be replayed
+
+    The log holds the actions rather than their results, so a fill or a
+    rainbow costs a few bytes however big the canvas.  Once its encoded size
+    passes EVENT_LOG_BUDGET_BYTES the log restarts from a snapshot of the
+    canvas.  The undo history is kept when that happens: the log tracks how
+    many undo and redo steps a replay of it could take, and an undo or redo
+    reaching back past those is logged as a snapshot of its result instead.
+    """
+
+    def __init__(self, events=None):
+        self.events = [] if events is None else list(events)
+        self.nbytes = sum(_encoded_size(event) for event in self.events)
+        # Steps that replaying the log puts on its own undo and redo stacks
+        # and that match the ones on the canvas's history
+        self._undo_depth = 0
+        self._redo_depth = 0
+
+    def __len__(self):
+        return len(self.events)
+
+    def record(self, event, canvas, changed=True):
+        """Add an event that has just been applied to canvas
+
+        changed is what apply_event() returned; events that changed nothing
+        are not logged.  Returns True if the log had to restart from a
+        snapshot.
+        """
+        if not changed:
+            return False
+        kind = event[0]
+        if kind == 'u' and self._undo_depth:
+            self._undo_depth -= 1
+            self._redo_depth += 1
+        elif kind == 'd' and self._redo_depth:
+            self._redo_depth -= 1
+            self._undo_depth += 1
+        elif kind in ('u', 'd'):
+            # The step is from before the log's last snapshot, so a replay could not take it
+            event = snapshot_event(canvas)
+            self._undo_depth = self._redo_depth = 0
+        else:
+            if kind == 'b':
+                event = [kind, event[1], event[2], pack_positions(event[3], canvas.size)]
+            self._undo_depth += 1
+            self._redo_depth = 0
+        self.events.append(event)
+        self.nbytes += _encoded_size(event)
+        if self.nbytes <= EVENT_LOG_BUDGET_BYTES:
+            return False
+        self.events = [snapshot_event(canvas)]
+        self.nbytes = _encoded_size(self.events[0])
+        self._undo_depth = self._redo_depth = 0
+        return True
+
+    def encode(self):
+        """Compressed form of the log for storage"""
+        return zlib.compress(json.dumps(self.events, separators=(',', ':')).encode())
+
+    @classmethod
+    def decode(cls, data):
+        """Rebuild a log from encode()"""
+        return cls(json.loads(zlib.decompress(data)))
+
+
+def pack_positions(positions, size):
+    """Brush positions on a size x size canvas as base64 of little-endian uint16s"""
+    positions = np.asarray(positions, dtype=np.intp)
+    positions = positions[(positions >= 0) & (positions < size * size)]
+    return base64.b64encode(positions.astype('<u2').tobytes()).decode()
+
+
+def unpack_positions(positions):
+    """Brush positions from pack_positions(), or as the plain list older logs hold"""
+    if isinstance(positions, str):
+        return np.frombuffer(base64.b64decode(positions), dtype='<u2')
+    return positions
+
+
+def snapshot_event(canvas):
+    """Event that sets the whole canvas to its current state"""
+    return ['p', base64.b64encode(canvas.to_png()).decode()]
+
+
+def seeded_event(kind):
+    """Rainbow ('r') or sparkle ('s') event with a fresh seed"""
+    return [kind, random.getrandbits(32)]
+
+
+def apply_event(canvas, history, event, load=None):
+    """Apply one event to canvas, recording it in history as one undo step
+
+    load(hash) returns the Canvas of a gallery artwork, for 'l' events.
+    Returns whether the canvas changed.
+    """
+    kind = event[0]
+    if kind == 'u':
+        return history.undo(canvas)
+    if kind == 'd':
+        return history.redo(canvas)
+    steps = history.steps
+    with history.change(canvas):
+        if kind == 'b':
+            paint_brush(canvas, unpack_positions(event[3]), event[1], event[2])
+        elif kind == 't':
+            apply_tool(canvas, event[1], tuple(event[4]), tuple(event[5]), event[2], event[3])
+        elif kind == 'f':
+            canvas.fill(event[1])
+        elif kind == 'c':
+            canvas.clear()
+        elif kind == 'r':
+            canvas.rainbow_fill(rng=np.random.default_rng(event[1]))
+        elif kind == 's':
+            canvas.sparkle(rng=np.random.default_rng(event[1]))
+        elif kind in ('n', 'l', 'p'):
+            if kind == 'n':
+                new = Canvas(event[1])
+            elif kind == 'l':
+                new = load(event[1])
+            else:
+                new = Canvas.from_png(base64.b64decode(event[1]))
+            canvas.restore(new.size, new.pixels, new.palette)
+        else:
+            raise ValueError(f"Unknown paint event: {kind}")
+    return history.steps != steps
+
+
+def replay(events, load=None):
+    """Yield the canvas after each event, starting from a blank canvas
+
+    The same Canvas object is yielded every time and changed in place, so
+    only one frame is ever held in memory.
+    """
+    canvas = Canvas(12)
+    history = CanvasHistory()
+    for event in events:
+        apply_event(canvas, history, event, load)
+        yield canvas
+
+
+def _encoded_size(event):
+    """Bytes event takes in the log's JSON"""
+    return len(json.dumps(event, separators=(',', ':')))
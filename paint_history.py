@@ -0,0 +1,146 @@
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# Undo history kept per session, in bytes of stored pixels
+HISTORY_BUDGET_BYTES = 256 * 1024
+# Bytes a delta stores per changed pixel: uint16 position, old and new index
+DELTA_BYTES_PER_PIXEL = 4
+
+
+class CanvasHistory:
+    """Undo and redo for a paint canvas, kept as compact deltas
+
+    Each change is stored as the positions it touched with their old and new
+    palette indices, so undoing or redoing it costs the size of the change.
+    Changes that touch most of the canvas, resize it or renumber its palette
+    are stored as a keyframe of the whole canvas before and after instead,
+    which is smaller than such a delta.  The oldest changes are dropped once
+    the history passes its memory budget.
+    """
+
+    def __init__(self, budget_bytes=HISTORY_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self.nbytes = 0
+        # Changes recorded so far, undone or not
+        self.steps = 0
+        self._undo = deque()
+        self._redo = []
+
+    def clear(self):
+        """Forget every step"""
+        self.nbytes = 0
+        self._undo.clear()
+        self._redo.clear()
+
+    def can_undo(self):
+        """Whether there is a change to undo"""
+        return bool(self._undo)
+
+    def can_redo(self):
+        """Whether there is an undone change to redo"""
+        return bool(self._redo)
+
+    @contextmanager
+    def change(self, canvas):
+        """Record whatever the body of the with block does to canvas as one step"""
+        before = _Snapshot(canvas)
+        yield
+        entry = _diff(before, canvas)
+        if entry is None:
+            return
+        self.steps += 1
+        for dropped in self._redo:
+            self.nbytes -= dropped.nbytes
+        self._redo.clear()
+        self._undo.append(entry)
+        self.nbytes += entry.nbytes
+        while self.nbytes > self.budget_bytes and len(self._undo) > 1:
+            self.nbytes -= self._undo.popleft().nbytes
+
+    def undo(self, canvas):
+        """Take back the latest change; return False if there is none"""
+        if not self._undo:
+            return False
+        entry = self._undo.pop()
+        entry.revert(canvas)
+        self._redo.append(entry)
+        return True
+
+    def redo(self, canvas):
+        """Make the latest undone change again; return False if there is none"""
+        if not self._redo:
+            return False
+        entry = self._redo.pop()
+        entry.apply(canvas)
+        self._undo.append(entry)
+        return True
+
+
+class _Snapshot:
+    """The whole state of a canvas at one moment"""
+
+    def __init__(self, canvas):
+        self.size = canvas.size
+        self.pixels = canvas.pixels.copy()
+        self.palette = canvas.palette[:]
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the snapshot"""
+        return self.pixels.nbytes + sum(len(color) for color in self.palette)
+
+    def restore(self, canvas):
+        """Put canvas back into this state"""
+        canvas.restore(self.size, self.pixels, self.palette)
+
+
+class _Delta:
+    """Pixels one change touched, with their palette indices before and after
+
+    The palette after the change is kept too: the indices stay valid with it
+    both ways, since changes only ever append colors.
+    """
+
+    def __init__(self, positions, old, new, palette):
+        self.positions = positions
+        self.old = old
+        self.new = new
+        self.palette = palette
+        self.nbytes = positions.nbytes + old.nbytes + new.nbytes + sum(len(color) for color in palette)
+
+    def revert(self, canvas):
+        canvas.restore_pixels(self.positions, self.old, self.palette)
+
+    def apply(self, canvas):
+        canvas.restore_pixels(self.positions, self.new, self.palette)
+
+
+class _Keyframe:
+    """Whole canvas before and after a change"""
+
+    def __init__(self, before, after):
+        self.before = before
+        self.after = after
+        self.nbytes = before.nbytes + after.nbytes
+
+    def revert(self, canvas):
+        self.before.restore(canvas)
+
+    def apply(self, canvas):
+        self.after.restore(canvas)
+
+
+def _diff(before, canvas):
+    """History entry for the change from before to canvas, or None if nothing changed"""
+    palette_kept = canvas.palette[:len(before.palette)] == before.palette
+    if before.size != canvas.size or not palette_kept:
+        return _Keyframe(before, _Snapshot(canvas))
+    changed = np.flatnonzero(before.pixels != canvas.pixels)
+    if not changed.size:
+        # New palette colors with no pixels using them are not worth a step
+        return None
+    if changed.size * DELTA_BYTES_PER_PIXEL >= 2 * canvas.pixels.size:
+        return _Keyframe(before, _Snapshot(canvas))
+    return _Delta(changed.astype(np.uint16), before.pixels[changed], canvas.pixels[changed], canvas.palette[:])
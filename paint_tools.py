@@ -0,0 +1,179 @@
+import numpy as np
+
+# tool name -> label shown in Paint Studio
+TOOLS = {
+    'brush': "✏️ Brush",
+    'line': "📏 Line",
+    'rect': "⬜ Box",
+    'rect_fill': "⬛ Filled Box",
+    'circle': "⭕ Circle",
+    'circle_fill': "🔴 Filled Circle",
+    'fill': "🪣 Fill",
+}
+
+# symmetry name -> label shown in Paint Studio
+SYMMETRIES = {
+    'none': "🚫 None",
+    'horizontal': "↔️ Mirror",
+    'vertical': "↕️ Flip",
+    'quad': "✳️ Four-way",
+}
+
+
+def line_mask(size, start, end):
+    """Pixels on the Bresenham line from start to end"""
+    mask = np.zeros((size, size), dtype=bool)
+    rows, cols = line_points(start, end)
+    keep = (rows >= 0) & (rows < size) & (cols >= 0) & (cols < size)
+    mask[rows[keep], cols[keep]] = True
+    return mask
+
+
+def line_points(start, end):
+    """Rows and columns of the Bresenham line from start to end
+
+    Steps along the longer axis and rounds the other, which picks the same
+    pixels as the incremental error-term loop without a Python loop.
+    """
+    (i0, j0), (i1, j1) = start, end
+    di, dj = i1 - i0, j1 - j0
+    steps = max(abs(di), abs(dj))
+    if steps == 0:
+        return np.array([i0]), np.array([j0])
+    t = np.arange(steps + 1)
+    return i0 + _round_step(di, t, steps), j0 + _round_step(dj, t, steps)
+
+
+def rect_mask(size, start, end, filled=False):
+    """Pixels of the box with corners start and end"""
+    mask = np.zeros((size, size), dtype=bool)
+    top, bottom = sorted((start[0], end[0]))
+    left, right = sorted((start[1], end[1]))
+    top, left = max(top, 0), max(left, 0)
+    bottom, right = min(bottom, size - 1), min(right, size - 1)
+    if top > bottom or left > right:
+        return mask
+    if filled:
+        mask[top:bottom + 1, left:right + 1] = True
+    else:
+        mask[[top, bottom], left:right + 1] = True
+        mask[top:bottom + 1, [left, right]] = True
+    return mask
+
+
+def circle_mask(size, center, radius, filled=False):
+    """Pixels of the circle around center
+
+    A pixel is on the outline when its distance from the center rounds to
+    radius, which gives an unbroken ring at every size.
+    """
+    rows, cols = np.ogrid[:size, :size]
+    distance = (rows - center[0]) ** 2 + (cols - center[1]) ** 2
+    outer = (radius + 0.5) ** 2
+    if filled:
+        return distance < outer
+    inner = max(radius - 0.5, 0) ** 2
+    return (distance >= inner) & (distance < outer)
+
+
+def flood_mask(grid, seed):
+    """Pixels connected to seed (4-way) that share its palette index
+
+    Scanline fill done as a graph search: the runs of matching pixels in each
+    row and which runs touch across rows are found with array operations over
+    the whole canvas, then only the run graph is walked in Python, so the
+    cost grows with the number of runs rather than pixels.
+    """
+    size = grid.shape[0]
+    row, col = seed
+    if not (0 <= row < size and 0 <= col < size):
+        return np.zeros(grid.shape, dtype=bool)
+    matches = grid == grid[row, col]
+    # Number the runs of matching pixels row by row; 0 marks other pixels
+    starts = matches.copy()
+    starts[:, 1:] &= ~matches[:, :-1]
+    runs = np.cumsum(starts).reshape(size, size)
+    runs[~matches] = 0
+    run_count = int(runs.max())
+    # Runs touching across rows are joined; keep the first column of each overlap
+    touching = matches[:-1] & matches[1:]
+    upper, lower = runs[:-1], runs[1:]
+    first = touching.copy()
+    first[:, 1:] &= ~(touching[:, :-1] & (upper[:, 1:] == upper[:, :-1]) & (lower[:, 1:] == lower[:, :-1]))
+    sources = np.concatenate((upper[first], lower[first]))
+    targets = np.concatenate((lower[first], upper[first]))
+    order = np.argsort(sources, kind='stable')
+    offsets = np.searchsorted(sources[order], np.arange(run_count + 2)).tolist()
+    neighbours = targets[order].tolist()
+    seed_run = int(runs[row, col])
+    seen = {seed_run}
+    stack = [seed_run]
+    while stack:
+        run = stack.pop()
+        for neighbour in neighbours[offsets[run]:offsets[run + 1]]:
+            if neighbour not in seen:
+                seen.add(neighbour)
+                stack.append(neighbour)
+    reached = np.zeros(run_count + 1, dtype=bool)
+    reached[list(seen)] = True
+    return reached[runs]
+
+
+def mirror_mask(mask, symmetry):
+    """mask plus its reflections for the symmetry mode"""
+    if symmetry in ('horizontal', 'quad'):
+        mask = mask | mask[:, ::-1]
+    if symmetry in ('vertical', 'quad'):
+        mask = mask | mask[::-1, :]
+    return mask
+
+
+def mirror_points(points, size, symmetry):
+    """points plus their reflections for the symmetry mode"""
+    points = {tuple(point) for point in points}
+    if symmetry in ('horizontal', 'quad'):
+        points |= {(i, size - 1 - j) for i, j in points}
+    if symmetry in ('vertical', 'quad'):
+        points |= {(size - 1 - i, j) for i, j in points}
+    return points
+
+
+def apply_tool(canvas, tool, start, end, color, symmetry='none'):
+    """Draw with tool from start to end on canvas, mirrored for the symmetry mode"""
+    size = canvas.size
+    if tool == 'fill':
+        grid = canvas.grid()
+        mask = np.zeros((size, size), dtype=bool)
+        for seed in mirror_points([start], size, symmetry):
+            mask |= flood_mask(grid, seed)
+        canvas.paint_mask(mask, color)
+        return
+    if tool == 'line':
+        mask = line_mask(size, start, end)
+    elif tool in ('rect', 'rect_fill'):
+        mask = rect_mask(size, start, end, filled=tool == 'rect_fill')
+    elif tool in ('circle', 'circle_fill'):
+        radius = int(round(np.hypot(end[0] - start[0], end[1] - start[1])))
+        mask = circle_mask(size, start, radius, filled=tool == 'circle_fill')
+    else:
+        raise ValueError(f"Unknown paint tool: {tool}")
+    canvas.paint_mask(mirror_mask(mask, symmetry), color)
+
+
+def paint_brush(canvas, positions, color, symmetry='none'):
+    """Paint freehand brush positions (row-major indices), mirrored for the symmetry mode"""
+    size = canvas.size
+    positions = np.asarray(positions, dtype=np.intp)
+    positions = positions[(positions >= 0) & (positions < size * size)]
+    if symmetry == 'none':
+        canvas.paint_pixels(positions, color)
+        return
+    mask = np.zeros(size * size, dtype=bool)
+    mask[positions] = True
+    canvas.paint_mask(mirror_mask(mask.reshape(size, size), symmetry), color)
+
+
+def _round_step(delta, t, steps):
+    """delta * t / steps rounded half away from zero, in integers"""
+    offset = (2 * abs(delta) * t + steps) // (2 * steps)
+    return offset if delta >= 0 else -offset
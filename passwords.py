@@ -0,0 +1,159 @@
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Key derivation settings; raise the cost as server hardware allows
+PASSWORD_KDF = os.environ.get("KIDS_GAMES_PASSWORD_KDF", "scrypt")
+PBKDF2_ITERATIONS = int(os.environ.get("KIDS_GAMES_PBKDF2_ITERATIONS", "200000"))
+SCRYPT_N = int(os.environ.get("KIDS_GAMES_SCRYPT_N", str(2 ** 14)))
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+
+# Hashing runs on a small pool; requests beyond the queue limit are turned away
+HASH_WORKERS = int(os.environ.get("KIDS_GAMES_HASH_WORKERS", "2"))
+HASH_QUEUE_LIMIT = int(os.environ.get("KIDS_GAMES_HASH_QUEUE", "32"))
+
+# How many recently verified passwords to remember
+VERIFIED_CACHE_SIZE = 1024
+
+
+def hash_password(password, kdf=None, iterations=None, n=None):
+    """Hash password with a random salt using the configured KDF
+
+    The result records the KDF and its cost, e.g.
+    ``scrypt$16384$8$1$<salt>$<hash>`` or ``pbkdf2_sha256$200000$<salt>$<hash>``.
+    """
+    kdf = kdf or PASSWORD_KDF
+    salt = secrets.token_bytes(SALT_BYTES)
+    if kdf == 'scrypt':
+        n = n or SCRYPT_N
+        digest = _scrypt(password, salt, n, SCRYPT_R, SCRYPT_P)
+        return f"scrypt${n}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}"
+    if kdf == 'pbkdf2_sha256':
+        iterations = iterations or PBKDF2_ITERATIONS
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+        return f"pbkdf2_sha256${iterations}${salt.hex()}${digest.hex()}"
+    raise ValueError(f"Unknown password KDF: {kdf}")
+
+
+def verify_password(password, stored):
+    """Check password against a stored hash
+
+    Returns (matches, needs_rehash).  needs_rehash is True for legacy unsalted
+    SHA-256 hashes and for hashes made with a different KDF or cost.
+    """
+    parts = stored.split('$')
+    if len(parts) == 1:
+        # Legacy unsalted SHA-256 from before salted KDFs
+        digest = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(digest, stored), True
+    if parts[0] == 'scrypt':
+        n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+        digest = _scrypt(password, bytes.fromhex(parts[4]), n, r, p)
+        matches = hmac.compare_digest(digest.hex(), parts[5])
+        return matches, PASSWORD_KDF != 'scrypt' or (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    if parts[0] == 'pbkdf2_sha256':
+        iterations = int(parts[1])
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode(), bytes.fromhex(parts[2]), iterations)
+        matches = hmac.compare_digest(digest.hex(), parts[3])
+        return matches, PASSWORD_KDF != 'pbkdf2_sha256' or iterations != PBKDF2_ITERATIONS
+    raise ValueError(f"Unknown password hash format: {parts[0]}")
+
+
+def check_password(username, password, stored):
+    """Verify a login and, if the hash is outdated, compute its replacement
+
+    Returns (matches, new_hash) where new_hash is None unless the stored hash
+    should be upgraded.  A password verified recently for the same stored
+    hash is accepted from the cache without running the KDF again.
+    """
+    if _verified_cache.matches(username, stored, password):
+        return True, None
+    matches, needs_rehash = verify_password(password, stored)
+    if not matches:
+        return False, None
+    new_hash = hash_password(password) if needs_rehash else None
+    _verified_cache.remember(username, new_hash or stored, password)
+    return True, new_hash
+
+
+def submit_check_password(username, password, stored):
+    """Run check_password on the hashing pool; None if the queue is full"""
+    return _pool.submit(check_password, username, password, stored)
+
+
+def submit_hash_password(password):
+    """Run hash_password on the hashing pool; None if the queue is full"""
+    return _pool.submit(hash_password, password)
+
+
+class HashingPool:
+    """Thread pool with a bounded number of queued and running jobs
+
+    hashlib releases the GIL while deriving keys, so hashing here leaves the
+    Streamlit script threads free to keep serving other reruns.
+    """
+
+    def __init__(self, workers, queue_limit):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+
+    def submit(self, fn, *args):
+        """Queue fn(*args) and return its future, or None when the queue is full"""
+        if not self._slots.acquire(blocking=False):
+            return None
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+
+class VerifiedCache:
+    """Remember recently verified passwords so they are not hashed again
+
+    Entries hold a keyed HMAC of the password, never the password itself, and
+    are tied to the stored hash so a password change invalidates them.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._key = secrets.token_bytes(32)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def remember(self, username, stored, password):
+        """Record that password is correct for this stored hash"""
+        with self._lock:
+            self._entries[username] = (stored, self._tag(password))
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def matches(self, username, stored, password):
+        """Whether password was recently verified for this stored hash"""
+        with self._lock:
+            entry = self._entries.get(username)
+        if entry is None or entry[0] != stored:
+            return False
+        return hmac.compare_digest(entry[1], self._tag(password))
+
+    def _tag(self, password):
+        """Keyed digest of a password"""
+        return hmac.new(self._key, password.encode(), hashlib.sha256).digest()
+
+
+def _scrypt(password, salt, n, r, p):
+    """scrypt with enough memory allowed for the requested cost"""
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + (1 << 20))
+
+
+_pool = HashingPool(HASH_WORKERS, HASH_QUEUE_LIMIT)
+_verified_cache = VerifiedCache(VERIFIED_CACHE_SIZE)
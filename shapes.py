@@ -0,0 +1,132 @@
+import math
+import random
+
+from canvas_render import LRUCache
+
+# Generated SVGs kept per process; each is a few hundred bytes
+SVG_CACHE_SIZE = 1024
+# Shapes are drawn in a 200 x 200 box around its center
+SVG_PX = 200
+CENTER = SVG_PX // 2
+POLYGON_RADIUS = 80
+
+SCALES = (0.7, 0.85, 1.0)
+# Fill color per shape in registry order; "classic" keeps each shape's own color
+THEMES = {
+    'classic': None,
+    'ocean': ["#1E90FF", "#00CED1", "#4682B4", "#5F9EA0", "#40E0D0", "#6495ED"],
+    'candy': ["#FF69B4", "#FFB6C1", "#DA70D6", "#FF1493", "#EE82EE", "#F08080"],
+    'forest': ["#228B22", "#6B8E23", "#32CD32", "#8FBC8F", "#556B2F", "#9ACD32"],
+    'sunset': ["#FF4500", "#FF8C00", "#FFD700", "#FF6347", "#FFA07A", "#F4A460"],
+}
+
+# name: (SVG element with a {fill} placeholder, color, emoji, fun fact, rotations)
+# Rotations stay small where turning a shape far would make it look like
+# another one (a square turned 45 degrees is a diamond).
+BASIC_SHAPES = {
+    "circle": ('<circle cx="100" cy="100" r="80" fill="{fill}"/>', "#FF6B6B", "🔴",
+               "A circle is perfectly round like a ball!", (0,)),
+    "square": ('<rect x="40" y="40" width="120" height="120" fill="{fill}"/>', "#4ECDC4", "🟩",
+               "A square has 4 equal sides and 4 corners!", (0, -10, 10)),
+    "triangle": ('<polygon points="100,30 30,170 170,170" fill="{fill}"/>', "#45B7D1", "🔺",
+                 "A triangle has 3 sides and 3 corners!", (0, 30, 90, 180, 270)),
+    "rectangle": ('<rect x="30" y="60" width="140" height="80" fill="{fill}"/>', "#96CEB4", "🟨",
+                  "A rectangle has 4 sides - 2 long and 2 short!", (0, -10, 10, 90)),
+    "star": ('<polygon points="100,20 120,70 175,70 135,105 150,160 100,130 50,160 65,105 25,70 80,70" '
+             'fill="{fill}"/>', "#FFEAA7", "⭐", "A star has 5 points and shines bright!", (0, 20, 180)),
+    "diamond": ('<polygon points="100,30 170,100 100,170 30,100" fill="{fill}"/>', "#DDA0DD", "💎",
+                "A diamond is like a square turned sideways!", (0, -10, 10)),
+    "oval": ('<ellipse cx="100" cy="100" rx="90" ry="60" fill="{fill}"/>', "#FFB6C1", "🥚",
+             "An oval is like a stretched circle, like an egg!", (0, 30, 90, 150)),
+    "heart": ('<path d="M100,180 C100,180 20,120 20,80 C20,50 40,30 70,30 C85,30 100,40 100,40 '
+              'C100,40 115,30 130,30 C160,30 180,50 180,80 C180,120 100,180 100,180 Z" fill="{fill}"/>',
+              "#FF69B4", "💖", "A heart shape shows love and kindness!", (0, -15, 15)),
+}
+
+# name: (sides, color, emoji, fun fact)
+POLYGONS = {
+    "pentagon": (5, "#F7B267", "⬟", "A pentagon has 5 sides, like the outline of a house!"),
+    "hexagon": (6, "#F9D56E", "⬢", "A hexagon has 6 sides, like the cells bees make in a honeycomb!"),
+    "heptagon": (7, "#A29BFE", "7️⃣", "A heptagon has 7 sides - some coins are this shape!"),
+    "octagon": (8, "#E17055", "🛑", "An octagon has 8 sides, just like a stop sign!"),
+}
+
+
+def polygon_points(sides, radius=POLYGON_RADIUS):
+    """Corners of a regular polygon around the center, the first one at the top"""
+    points = []
+    for k in range(sides):
+        angle = 2 * math.pi * k / sides - math.pi / 2
+        points.append(f"{CENTER + radius * math.cos(angle):.1f},{CENTER + radius * math.sin(angle):.1f}")
+    return " ".join(points)
+
+
+class ShapeRegistry:
+    """Every quiz shape, built once per process and shared by all sessions
+
+    Each shape can be drawn in many variants (turned, scaled and colored by
+    a theme); variant SVGs are generated on first use and memoized by their
+    parameters in a bounded LRU, so more quiz items cost no extra memory per
+    session.
+    """
+
+    def __init__(self, cache_size=SVG_CACHE_SIZE):
+        self.shapes = {}
+        for name, (element, color, emoji, fun_fact, rotations) in BASIC_SHAPES.items():
+            self._add(name, element, color, emoji, fun_fact, rotations)
+        for name, (sides, color, emoji, fun_fact) in POLYGONS.items():
+            element = f'<polygon points="{polygon_points(sides)}" fill="{{fill}}"/>'
+            # A regular polygon looks the same turned by a whole side
+            rotations = tuple(range(0, 360 // sides, 360 // sides // 3))
+            self._add(name, element, color, emoji, fun_fact, rotations)
+        self._svg = LRUCache(cache_size)
+
+    def _add(self, name, element, color, emoji, fun_fact, rotations):
+        self.shapes[name] = {
+            'element': element, 'color': color, 'emoji': emoji, 'fun_fact': fun_fact,
+            'rotations': rotations, 'index': len(self.shapes),
+        }
+
+    def names(self):
+        """Names of every shape, in registry order"""
+        return list(self.shapes)
+
+    def info(self, name):
+        """A shape's emoji, fun fact and other fixed data"""
+        return self.shapes[name]
+
+    def variants(self, name):
+        """Number of different ways a shape can be drawn"""
+        return len(self.shapes[name]['rotations']) * len(SCALES) * len(THEMES)
+
+    def random_variant(self, name, rng=random):
+        """(rotation, scale, theme) for drawing a shape at random"""
+        return rng.choice(self.shapes[name]['rotations']), rng.choice(SCALES), rng.choice(list(THEMES))
+
+    def question(self, rng=random, choices=4, avoid=None):
+        """A quiz question: a shape, how it is drawn and the answers to choose from
+
+        Returns a dict with the shape name, its (rotation, scale, theme)
+        variant and the shuffled answer options, the shape and choices - 1
+        other shapes.  avoid is a shape not to ask about, like the last one.
+        """
+        names = [name for name in self.shapes if name != avoid]
+        shape = rng.choice(names)
+        options = [shape] + rng.sample([name for name in self.shapes if name != shape], choices - 1)
+        rng.shuffle(options)
+        return {'shape': shape, 'variant': self.random_variant(shape, rng), 'options': options}
+
+    def svg(self, name, rotation=0, scale=1.0, theme='classic'):
+        """SVG of a shape turned by rotation degrees, scaled around its center and colored by theme"""
+        key = (name, rotation, scale, theme)
+        svg = self._svg.get(key)
+        if svg is None:
+            shape = self.shapes[name]
+            colors = THEMES[theme]
+            fill = shape['color'] if colors is None else colors[shape['index'] % len(colors)]
+            svg = (f'<svg width="{SVG_PX}" height="{SVG_PX}" viewBox="0 0 {SVG_PX} {SVG_PX}">'
+                   f'<g transform="translate({CENTER} {CENTER}) rotate({rotation}) scale({scale}) '
+                   f'translate(-{CENTER} -{CENTER})" stroke="#333" stroke-width="{3 / scale:.1f}">'
+                   f'{shape["element"].format(fill=fill)}</g></svg>')
+            self._svg.put(key, svg)
+        return svg
@@ -0,0 +1,118 @@
+import struct
+import zlib
+
+import numpy as np
+
+from paint_events import replay
+
+# Side of timelapse frames; every canvas size divides it evenly
+TIMELAPSE_PX = 384
+FRAME_MS = 150
+# Long logs are sampled down to this many frames, so every timelapse costs about the same
+MAX_FRAMES = 120
+# How long the finished picture stays up before the animation loops
+LAST_FRAME_MS = 2000
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+class APNGWriter:
+    """Animated PNG written to a file one frame at a time
+
+    Each frame after the first stores only the rectangle that changed since
+    the one before, and only the previous frame is kept in memory, so long
+    animations cost memory for one frame however many there are.  The number
+    of frames has to be known up front because APNG records it first.
+    """
+
+    def __init__(self, out, width, height, frame_count, plays=0):
+        self.out = out
+        self.width = width
+        self.height = height
+        self.frame_count = frame_count
+        self._previous = None
+        self._sequence = 0
+        self._frames = 0
+        out.write(PNG_SIGNATURE)
+        # 8-bit truecolor, default compression, filter and no interlacing
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+        self._chunk(b'acTL', struct.pack('>II', frame_count, plays))
+
+    def add(self, rgb, delay_ms):
+        """Write the next frame, an height x width x 3 uint8 array"""
+        if self._frames >= self.frame_count:
+            raise ValueError("More frames than the animation was declared with")
+        if self._previous is None:
+            top, left, bottom, right = 0, 0, self.height, self.width
+        else:
+            changed = np.any(rgb != self._previous, axis=2)
+            rows = np.flatnonzero(changed.any(axis=1))
+            if rows.size:
+                cols = np.flatnonzero(changed.any(axis=0))
+                top, bottom, left, right = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+            else:
+                # Nothing changed: a one pixel frame just holds the picture longer
+                top, left, bottom, right = 0, 0, 1, 1
+        region = rgb[top:bottom, left:right]
+        # Dispose op none and blend op source: the region replaces what was there
+        self._chunk(b'fcTL', struct.pack('>IIIIIHHBB', self._next_sequence(), right - left, bottom - top,
+                                         left, top, delay_ms, 1000, 0, 0))
+        # Each scanline starts with filter type 0
+        scanlines = np.zeros((region.shape[0], region.shape[1] * 3 + 1), dtype=np.uint8)
+        scanlines[:, 1:] = region.reshape(region.shape[0], -1)
+        data = zlib.compress(scanlines.tobytes())
+        if self._previous is None:
+            self._chunk(b'IDAT', data)
+        else:
+            self._chunk(b'fdAT', struct.pack('>I', self._next_sequence()) + data)
+        self._previous = rgb.copy()
+        self._frames += 1
+
+    def close(self):
+        """Finish the file; every declared frame must have been added"""
+        if self._frames != self.frame_count:
+            raise ValueError(f"Animation declared {self.frame_count} frames but got {self._frames}")
+        self._chunk(b'IEND', b'')
+
+    def _next_sequence(self):
+        """Sequence numbers run across fcTL and fdAT chunks"""
+        sequence = self._sequence
+        self._sequence += 1
+        return sequence
+
+    def _chunk(self, kind, data):
+        """Write one PNG chunk with its length and CRC"""
+        self.out.write(struct.pack('>I', len(data)) + kind + data)
+        self.out.write(struct.pack('>I', zlib.crc32(kind + data)))
+
+
+def canvas_rgb(canvas, side):
+    """The canvas as a side x side x 3 RGB array, each pixel scaled up evenly"""
+    palette = np.array([bytearray.fromhex(color[1:]) for color in canvas.palette], dtype=np.uint8)
+    rgb = palette[canvas.grid()]
+    scale = max(1, side // canvas.size)
+    rgb = rgb.repeat(scale, axis=0).repeat(scale, axis=1)[:side, :side]
+    if rgb.shape[0] < side:
+        frame = np.full((side, side, 3), 255, dtype=np.uint8)
+        frame[:rgb.shape[0], :rgb.shape[1]] = rgb
+        rgb = frame
+    return rgb
+
+
+def write_timelapse(events, out, load=None, side=TIMELAPSE_PX, delay_ms=FRAME_MS, max_frames=MAX_FRAMES):
+    """Replay a paint event log into out as an animated PNG
+
+    Every event is replayed, but only every step-th one is drawn as a frame
+    so there are at most max_frames; the last event always is.  Frames are
+    rendered and written as the log is replayed, never collected.
+    load(hash) returns gallery artworks the log loaded.
+    """
+    count = len(events)
+    step = -(-count // max_frames)
+    writer = APNGWriter(out, side, side, -(-count // step))
+    for number, canvas in enumerate(replay(events, load), 1):
+        if number == count:
+            writer.add(canvas_rgb(canvas, side), LAST_FRAME_MS)
+        elif number % step == 0:
+            writer.add(canvas_rgb(canvas, side), delay_ms)
+    writer.close()
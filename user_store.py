@@ -0,0 +1,902 @@
+import atexit
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+# Compact the journal into the snapshot once it grows past this size
+COMPACT_THRESHOLD_BYTES = 256 * 1024
+
+# Players registered through other server processes are picked up at most this often
+DIRECTORY_REFRESH_SECONDS = 10
+
+# Stores opened on the same file in one process share a writer lock
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+
+
+class UserLocks:
+    """One lock per username, so changes to different users never wait on each other"""
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks = {}
+
+    def __call__(self, username):
+        with self._guard:
+            lock = self._locks.get(username)
+            if lock is None:
+                lock = self._locks[username] = threading.Lock()
+            return lock
+
+
+class UserStore:
+    """Read-modify-write helpers shared by the user store backends
+
+    A single store is shared by every session in the server process, so each
+    change to a user's record happens under that user's lock.
+    """
+
+    def __init__(self):
+        self._user_locks = UserLocks()
+
+    def create(self, username, record):
+        """Add a new user; return False if the username is already taken"""
+        with self._user_locks(username):
+            if username in self:
+                return False
+            self.put(username, record)
+            return True
+
+    def update(self, username, change):
+        """Apply change(record) to a user's record and save it
+
+        Returns the updated record, or None if the user does not exist.
+        """
+        with self._user_locks(username):
+            record = self.get(username)
+            if record is None:
+                return None
+            change(record)
+            self.put(username, record)
+            return record
+
+    def update_many(self, items):
+        """Apply several (username, change) pairs; changes to missing users are skipped"""
+        for username, change in items:
+            self.update(username, change)
+
+
+class JournalUserStore(UserStore):
+    """User data kept as a JSON snapshot plus an append-only journal
+
+    The snapshot is the original ``kids_games_users.json`` file, so existing
+    data keeps loading.  Every change appends one small JSON line holding the
+    full record of a single user to ``<snapshot>.journal``; loading replays the
+    journal on top of the snapshot.  When the journal passes the compaction
+    threshold a background thread folds it into a fresh snapshot.
+
+    Several server processes can share the files.  Writers take an advisory
+    lock on ``<snapshot>.lock``; readers never lock, because the snapshot is
+    only ever replaced atomically and a half-written journal line is ignored
+    until it is complete.  Before each read the store picks up whatever other
+    processes have appended or compacted since.
+    """
+
+    def __init__(self, path, compact_threshold=COMPACT_THRESHOLD_BYTES):
+        super().__init__()
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.lock_path = path + '.lock'
+        self.meta_path = path + '.meta'
+        self.compact_threshold = compact_threshold
+        self._lock = threading.Lock()
+        self._write_lock = _write_lock_for(path)
+        self._compactor = None
+        self._users = {}
+        self._meta = {}
+        self._journal_size = 0
+        self._seen = None
+        self._refresh()
+
+    def __contains__(self, username):
+        self._refresh()
+        return username in self._users
+
+    def __len__(self):
+        self._refresh()
+        return len(self._users)
+
+    def usernames(self):
+        """Return all usernames"""
+        self._refresh()
+        with self._lock:
+            return list(self._users)
+
+    def get(self, username):
+        """Return a copy of a user's record, or None"""
+        self._refresh()
+        with self._lock:
+            record = self._users.get(username)
+            if record is None:
+                return None
+            return json.loads(json.dumps(record))
+
+    def create(self, username, record):
+        """Add a new user; return False if the username is already taken"""
+        with self._exclusive():
+            if username in self._users:
+                return False
+            self._append([{'u': username, 'd': record}])
+        self._maybe_compact()
+        return True
+
+    def update(self, username, change):
+        """Apply change(record) to a user's record and save it
+
+        The read and the append happen under the writer lock, so concurrent
+        updates from other threads or processes are never lost.
+        """
+        with self._exclusive():
+            record = self._users.get(username)
+            if record is None:
+                return None
+            record = json.loads(json.dumps(record))
+            change(record)
+            self._append([{'u': username, 'd': record}])
+        self._maybe_compact()
+        return record
+
+    def update_many(self, items):
+        """Apply several (username, change) pairs under one writer lock and one journal append"""
+        with self._exclusive():
+            # A later change to the same user starts from the earlier one
+            changed = {}
+            for username, change in items:
+                record = changed.get(username) or self._users.get(username)
+                if record is None:
+                    continue
+                record = json.loads(json.dumps(record))
+                change(record)
+                changed[username] = record
+            if changed:
+                self._append([{'u': username, 'd': record} for username, record in changed.items()])
+        self._maybe_compact()
+
+    def put(self, username, record):
+        """Store a user's record by appending it to the journal"""
+        self.put_many([(username, record)])
+
+    def put_many(self, items):
+        """Store several (username, record) pairs with a single journal append"""
+        with self._exclusive():
+            self._append([{'u': username, 'd': record} for username, record in items])
+        self._maybe_compact()
+
+    def get_meta(self, key):
+        """Return a stored non-user value such as the leaderboards, or None"""
+        self._refresh()
+        with self._lock:
+            value = self._meta.get(key)
+            return None if value is None else json.loads(json.dumps(value))
+
+    def put_meta(self, key, value):
+        """Store a non-user value by appending it to the journal"""
+        with self._exclusive():
+            self._append([{'m': key, 'd': value}])
+        self._maybe_compact()
+
+    def update_meta(self, key, change):
+        """Replace a non-user value with change(stored value or None) under the writer lock"""
+        with self._exclusive():
+            value = self._meta.get(key)
+            value = change(None if value is None else json.loads(json.dumps(value)))
+            self._append([{'m': key, 'd': value}])
+        self._maybe_compact()
+        return value
+
+    def compact(self):
+        """Fold the journal into a new snapshot and start an empty journal"""
+        with self._exclusive():
+            if self._journal_size < self.compact_threshold:
+                # Another process compacted while we waited for the lock
+                return
+            with self._lock:
+                meta = json.dumps(self._meta)
+                data = json.dumps(self._users, indent=2)
+            # Meta first: readers reload it whenever the snapshot changes
+            _atomic_write(self.meta_path, meta.encode('utf-8'))
+            _atomic_write(self.path, data.encode('utf-8'))
+            _atomic_write(self.journal_path, b'')
+            with self._lock:
+                self._journal_size = 0
+                self._seen = _file_signatures(self.path, self.journal_path)
+
+    def _append(self, entries):
+        """Append journal entries; the caller holds the writer lock"""
+        lines = [json.dumps(entry) + '\n' for entry in entries]
+        with open(self.journal_path, 'ab') as f:
+            if f.tell() > self._journal_size:
+                # Drop a torn final line left by a writer that crashed mid-append
+                f.truncate(self._journal_size)
+                f.seek(self._journal_size)
+            f.write(''.join(lines).encode('utf-8'))
+            f.flush()
+            journal_size = f.tell()
+        with self._lock:
+            for line in lines:
+                _apply_entry(json.loads(line), self._users, self._meta)
+            self._journal_size = journal_size
+            self._seen = _file_signatures(self.path, self.journal_path)
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the writer lock across threads and processes, up to date with disk"""
+        with self._write_lock:
+            with open(self.lock_path, 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._refresh()
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Pick up journal entries and compactions written by other processes"""
+        with self._lock:
+            snapshot, journal = _file_signatures(self.path, self.journal_path)
+            if self._seen is not None and snapshot == self._seen[0] and _same_file(journal, self._seen[1]):
+                # Same files as last time: just replay whatever was appended
+                if journal is not None and journal[2] > self._journal_size:
+                    self._journal_size = _replay_journal(
+                        self.journal_path, self._users, self._meta, self._journal_size
+                    )
+                self._seen = (snapshot, journal)
+                return
+            while True:
+                # Compaction replaces the snapshot before the journal, so if the
+                # snapshot changed while we read, read both again
+                users = _read_snapshot(self.path)
+                meta = _read_snapshot(self.meta_path)
+                journal_size = _replay_journal(self.journal_path, users, meta)
+                after = _file_signatures(self.path, self.journal_path)
+                if after[0] == snapshot:
+                    break
+                snapshot = after[0]
+            self._users = users
+            self._meta = meta
+            self._journal_size = journal_size
+            self._seen = after
+
+    def _maybe_compact(self):
+        """Start a background compaction once the journal is large enough"""
+        if self._journal_size < self.compact_threshold:
+            return
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            self._compactor = threading.Thread(target=self.compact, name='user-store-compactor', daemon=True)
+            self._compactor.start()
+
+
+def _write_lock_for(path):
+    """Return the thread lock shared by every store writing to path"""
+    key = os.path.abspath(path)
+    with _path_locks_guard:
+        if key not in _path_locks:
+            _path_locks[key] = threading.Lock()
+        return _path_locks[key]
+
+
+def _file_signatures(*paths):
+    """(inode, mtime, size) for each path, or None where a file is missing"""
+    signatures = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            signatures.append(None)
+        else:
+            signatures.append((st.st_ino, st.st_mtime_ns, st.st_size))
+    return tuple(signatures)
+
+
+def _same_file(a, b):
+    """Whether two signatures from _file_signatures name the same file"""
+    if a is None or b is None:
+        return a is b
+    return a[0] == b[0]
+
+
+def _atomic_write(path, data):
+    """Replace path with data so readers see either the old or the new file, never a partial one"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    if hasattr(os, 'O_DIRECTORY'):
+        # Make the rename itself durable
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def _read_snapshot(path):
+    """Load a JSON snapshot file, or an empty dict if there is none"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _apply_entry(entry, users, meta):
+    """Apply one journal entry: a user record ('u') or a meta value ('m')"""
+    if 'u' in entry:
+        users[entry['u']] = entry['d']
+    else:
+        meta[entry['m']] = entry['d']
+
+
+def _replay_journal(journal_path, users, meta, start=0):
+    """Apply complete journal entries after start; return the offset reached"""
+    if not os.path.exists(journal_path):
+        return 0
+    offset = start
+    with open(journal_path, 'rb') as f:
+        f.seek(start)
+        for raw in f:
+            if not raw.endswith(b'\n'):
+                # Torn or still-being-written final line
+                break
+            _apply_entry(json.loads(raw), users, meta)
+            offset += len(raw)
+    return offset
+
+
+# (game, stat) pairs that get their own column in the SQLite users table
+STAT_COLUMNS = [
+    ('memory', 'games_played'),
+    ('memory', 'best_moves'),
+    ('memory', 'best_time'),
+    ('math', 'questions_answered'),
+    ('math', 'correct_answers'),
+    ('math', 'best_streak'),
+    ('shapes', 'questions_answered'),
+    ('shapes', 'correct_answers'),
+    ('shapes', 'best_streak'),
+    ('paint', 'artworks_created'),
+]
+ACCOUNT_COLUMNS = ['password', 'display_name', 'created_date', 'last_login', 'total_games_played']
+
+
+class SQLiteUserStore(UserStore):
+    """User data kept one row per user in a SQLite database in WAL mode
+
+    Lookups go through the username primary key and only ever load the row
+    that was asked for.  Each per-game stat has its own column; any record
+    fields without a column are kept as JSON in ``extra``.  SQLite's own
+    locking keeps several server processes consistent.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._lock = threading.Lock()
+        # Other server processes may hold the write lock; wait for them
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        stat_columns = ', '.join(f"{_stat_column(game, stat)} INTEGER" for game, stat in STAT_COLUMNS)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS users ('
+            'username TEXT PRIMARY KEY, password TEXT NOT NULL, display_name TEXT NOT NULL, '
+            'created_date TEXT, last_login TEXT, total_games_played INTEGER NOT NULL DEFAULT 0, '
+            f'{stat_columns}, extra TEXT) WITHOUT ROWID'
+        )
+        self._conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID')
+        self._columns = ['username'] + ACCOUNT_COLUMNS + [_stat_column(g, s) for g, s in STAT_COLUMNS] + ['extra']
+
+    def __contains__(self, username):
+        with self._lock:
+            row = self._conn.execute('SELECT 1 FROM users WHERE username = ?', (username,)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+
+    def usernames(self):
+        """Return all usernames in sorted order"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute('SELECT username FROM users ORDER BY username')]
+
+    def get(self, username):
+        """Return a user's record, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self._columns)} FROM users WHERE username = ?", (username,)
+            ).fetchone()
+        if row is None:
+            return None
+        return _row_to_record(row)
+
+    def create(self, username, record):
+        """Add a new user; return False if the username is already taken"""
+        placeholders = ', '.join('?' * len(self._columns))
+        with self._lock:
+            try:
+                self._conn.execute(
+                    f"INSERT INTO users ({', '.join(self._columns)}) VALUES ({placeholders})",
+                    _record_to_row(username, record)
+                )
+            except sqlite3.IntegrityError:
+                return False
+        return True
+
+    def update(self, username, change):
+        """Apply change(record) to a user's record and save it
+
+        The read and the write share one IMMEDIATE transaction, so updates
+        from other threads or server processes are never lost.
+        """
+        placeholders = ', '.join('?' * len(self._columns))
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    f"SELECT {', '.join(self._columns)} FROM users WHERE username = ?", (username,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute('ROLLBACK')
+                    return None
+                record = _row_to_record(row)
+                change(record)
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO users ({', '.join(self._columns)}) VALUES ({placeholders})",
+                    _record_to_row(username, record)
+                )
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+        return record
+
+    def update_many(self, items):
+        """Apply several (username, change) pairs in one IMMEDIATE transaction"""
+        placeholders = ', '.join('?' * len(self._columns))
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                for username, change in items:
+                    row = self._conn.execute(
+                        f"SELECT {', '.join(self._columns)} FROM users WHERE username = ?", (username,)
+                    ).fetchone()
+                    if row is None:
+                        continue
+                    record = _row_to_record(row)
+                    change(record)
+                    self._conn.execute(
+                        f"INSERT OR REPLACE INTO users ({', '.join(self._columns)}) VALUES ({placeholders})",
+                        _record_to_row(username, record)
+                    )
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def put(self, username, record):
+        """Insert or replace a user's record"""
+        self.put_many([(username, record)])
+
+    def put_many(self, items):
+        """Insert or replace several (username, record) pairs in one transaction"""
+        rows = [_record_to_row(username, record) for username, record in items]
+        placeholders = ', '.join('?' * len(self._columns))
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO users ({', '.join(self._columns)}) VALUES ({placeholders})", rows
+                )
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def get_meta(self, key):
+        """Return a stored non-user value such as the leaderboards, or None"""
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def put_meta(self, key, value):
+        """Store a non-user value"""
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, json.dumps(value)))
+
+    def update_meta(self, key, change):
+        """Replace a non-user value with change(stored value or None) in one IMMEDIATE transaction"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+                value = change(None if row is None else json.loads(row[0]))
+                self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, json.dumps(value)))
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+        return value
+
+    def import_json(self, json_path):
+        """Copy every user from a journaled JSON store into the database"""
+        source = JournalUserStore(json_path)
+        self.put_many((username, source.get(username)) for username in source.usernames())
+        for key in source._meta:
+            self.put_meta(key, source.get_meta(key))
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+class WriteBehindUserStore(UserStore):
+    """Buffer record changes in memory and save them from a background thread
+
+    Changes wait in memory and are written to the wrapped store in one
+    batch every ``flush_ms`` milliseconds, as soon as ``max_pending`` users
+    are waiting, and when the process exits.  New accounts are written
+    straight through.  Reads see buffered changes immediately.
+
+    A flush does not write the buffered records whole: it applies the
+    buffered change functions again, in order, to each record as stored,
+    under the wrapped store's write lock (update_many()).  So server
+    processes sharing one store never overwrite each other's changes.
+    """
+
+    def __init__(self, inner, flush_ms, max_pending=100):
+        super().__init__()
+        self.inner = inner
+        self.flush_ms = flush_ms
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        # username: record with its buffered changes, for reads
+        self._pending = {}
+        self._flushing = {}
+        # username: the buffered changes themselves, for the flush
+        self._changes = {}
+        self._pending_meta = {}
+        self._flushing_meta = {}
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._counters = {
+            'flushes': 0,
+            'records_flushed': 0,
+            'flush_errors': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0,
+        }
+        self._flusher = threading.Thread(target=self._run, name='user-store-flusher', daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def __contains__(self, username):
+        with self._lock:
+            if username in self._pending or username in self._flushing:
+                return True
+        return username in self.inner
+
+    def __len__(self):
+        return len(self.inner)
+
+    def usernames(self):
+        """Return all usernames"""
+        return self.inner.usernames()
+
+    def get(self, username):
+        """Return a user's record, including changes not yet flushed"""
+        with self._lock:
+            record = self._pending.get(username) or self._flushing.get(username)
+            if record is not None:
+                return json.loads(json.dumps(record))
+        return self.inner.get(username)
+
+    def create(self, username, record):
+        """Add a new user straight to the wrapped store"""
+        with self._user_locks(username):
+            return self.inner.create(username, record)
+
+    def update(self, username, change):
+        """Apply change(record) to a user's record now and queue it for the next flush
+
+        Returns the updated record, or None if the user does not exist.
+        """
+        with self._user_locks(username):
+            record = self.get(username)
+            if record is None:
+                return None
+            change(record)
+            # The change may have put its own objects in the record
+            record = json.loads(json.dumps(record))
+            self._queue(username, change, record)
+            return record
+
+    def put(self, username, record):
+        """Queue a user's whole record to replace the stored one at the next flush"""
+        record = json.loads(json.dumps(record))
+
+        def replace(stored):
+            stored.clear()
+            stored.update(json.loads(json.dumps(record)))
+
+        with self._user_locks(username):
+            self._queue(username, replace, record)
+
+    def _queue(self, username, change, record):
+        """Buffer a change and the record it made"""
+        with self._lock:
+            self._pending[username] = record
+            self._changes.setdefault(username, []).append(change)
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def get_meta(self, key):
+        """Return a stored non-user value, including one not yet flushed"""
+        with self._lock:
+            for values in (self._pending_meta, self._flushing_meta):
+                if key in values:
+                    return json.loads(json.dumps(values[key]))
+        return self.inner.get_meta(key)
+
+    def put_meta(self, key, value):
+        """Queue a non-user value to be written by the next flush"""
+        value = json.loads(json.dumps(value))
+        with self._lock:
+            self._pending_meta[key] = value
+
+    def update_meta(self, key, change):
+        """Replace a non-user value with change(stored value or None), straight through
+
+        Anything buffered is flushed first, so a queued put_meta() cannot
+        land on top of the update afterwards.
+        """
+        self.flush()
+        return self.inner.update_meta(key, change)
+
+    def flush(self):
+        """Write every pending record to the wrapped store now"""
+        with self._flush_lock:
+            with self._lock:
+                # Records being written stay readable until the write lands
+                batch = self._flushing = self._pending
+                changes = self._changes
+                meta = self._flushing_meta = self._pending_meta
+                self._pending = {}
+                self._changes = {}
+                self._pending_meta = {}
+            if not batch and not meta:
+                return
+            start = time.perf_counter()
+            try:
+                if changes:
+                    self.inner.update_many((username, _apply_all(user_changes))
+                                           for username, user_changes in changes.items())
+                for key, value in meta.items():
+                    self.inner.put_meta(key, value)
+            except Exception:
+                # Keep the changes for the next attempt, ahead of any made since
+                with self._lock:
+                    for username, record in batch.items():
+                        self._pending.setdefault(username, record)
+                        self._changes[username] = changes[username] + self._changes.get(username, [])
+                    for key, value in meta.items():
+                        self._pending_meta.setdefault(key, value)
+                    self._flushing = {}
+                    self._flushing_meta = {}
+                    self._counters['flush_errors'] += 1
+                raise
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._flushing = {}
+                self._flushing_meta = {}
+                counters = self._counters
+                counters['flushes'] += 1
+                counters['records_flushed'] += len(batch)
+                counters['last_flush_ms'] = elapsed_ms
+                counters['max_flush_ms'] = max(counters['max_flush_ms'], elapsed_ms)
+                counters['total_flush_ms'] += elapsed_ms
+
+    def stats(self):
+        """Return pending write and flush latency counters"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['pending_writes'] = len(self._pending) + len(self._pending_meta)
+        total = stats.pop('total_flush_ms')
+        stats['avg_flush_ms'] = total / stats['flushes'] if stats['flushes'] else 0.0
+        return stats
+
+    def close(self):
+        """Stop the flusher thread and write out anything still pending"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._flusher.join()
+        self.flush()
+
+    def _run(self):
+        """Background loop: flush on the interval or when woken early"""
+        while not self._closed:
+            self._wake.wait(self.flush_ms / 1000)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # Records stay pending and are retried on the next pass
+                pass
+
+
+def _apply_all(changes):
+    """One change that applies several in order"""
+    def change(record):
+        for each in changes:
+            each(record)
+    return change
+
+
+class PlayerDirectory:
+    """Sorted, searchable list of players for the login screen
+
+    Built once from the store, then kept current by add() as players
+    register here and by refresh() for players registered through other
+    server processes, so counting players and finding a page of names
+    never reads every user's record.  Search is a case-insensitive username
+    prefix match found with bisect.
+    """
+
+    def __init__(self, players=(), refresh_seconds=DIRECTORY_REFRESH_SECONDS):
+        self._lock = threading.Lock()
+        self._keys = sorted((username.casefold(), username) for username, _ in players)
+        self._display_names = dict(players)
+        self.refresh_seconds = refresh_seconds
+        self._refreshed_at = time.monotonic()
+
+    @classmethod
+    def from_store(cls, store):
+        """Build the directory from every user in a store"""
+        players = []
+        for username in store.usernames():
+            record = store.get(username)
+            if record is not None:
+                players.append((username, record['display_name']))
+        return cls(players)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, username, display_name):
+        """Add a newly registered player"""
+        with self._lock:
+            if username not in self._display_names:
+                insort(self._keys, (username.casefold(), username))
+            self._display_names[username] = display_name
+
+    def refresh(self, store, force=False):
+        """Add players in the store that are missing here; return True if any were
+
+        Only the usernames are listed; records are read just for new players.
+        Does nothing until ``refresh_seconds`` have passed since the last
+        refresh, unless force is set.
+        """
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed_at < self.refresh_seconds:
+                return False
+            self._refreshed_at = time.monotonic()
+            known = set(self._display_names)
+        added = False
+        for username in store.usernames():
+            if username not in known:
+                record = store.get(username)
+                if record is not None:
+                    self.add(username, record['display_name'])
+                    added = True
+        return added
+
+    def search(self, prefix='', page=0, page_size=10):
+        """Return (players, matches) for one page of usernames starting with prefix
+
+        players is a list of (username, display_name); matches is the total
+        number of usernames with the prefix.
+        """
+        prefix = prefix.casefold()
+        with self._lock:
+            start = bisect_left(self._keys, (prefix,))
+            end = bisect_left(self._keys, (prefix + '\U0010ffff',)) if prefix else len(self._keys)
+            first = start + page * page_size
+            keys = self._keys[first:min(first + page_size, end)]
+            return [(username, self._display_names[username]) for _, username in keys], end - start
+
+
+def open_user_store(backend, db_path, json_path, flush_ms=0):
+    """Open the configured user store backend
+
+    The first time the SQLite database is opened it imports any users found
+    in the existing JSON file.  With ``flush_ms`` above zero, record changes
+    are buffered and written in batches by a WriteBehindUserStore.
+    """
+    if backend == 'journal':
+        store = JournalUserStore(json_path)
+    elif backend == 'sqlite':
+        store = SQLiteUserStore(db_path)
+        if len(store) == 0 and (os.path.exists(json_path) or os.path.exists(json_path + '.journal')):
+            store.import_json(json_path)
+    else:
+        raise ValueError(f"Unknown user store backend: {backend}")
+    if flush_ms > 0:
+        store = WriteBehindUserStore(store, flush_ms)
+    return store
+
+
+def _stat_column(game, stat):
+    """Column name for a per-game stat"""
+    return f"{game}_{stat}"
+
+
+def _record_to_row(username, record):
+    """Split a nested user record into SQLite column values"""
+    extra = {key: value for key, value in record.items() if key not in ACCOUNT_COLUMNS and key != 'game_stats'}
+    game_stats = record.get('game_stats', {})
+    extra_stats = {}
+    for game, stats in game_stats.items():
+        leftover = {stat: value for stat, value in stats.items() if (game, stat) not in STAT_COLUMNS}
+        if leftover:
+            extra_stats[game] = leftover
+    if extra_stats:
+        extra['game_stats'] = extra_stats
+    row = [username] + [record.get(column) for column in ACCOUNT_COLUMNS]
+    row += [game_stats.get(game, {}).get(stat) for game, stat in STAT_COLUMNS]
+    row.append(json.dumps(extra) if extra else None)
+    return row
+
+
+def _row_to_record(row):
+    """Rebuild the nested user record from a users table row"""
+    values = list(row[1:])
+    record = dict(zip(ACCOUNT_COLUMNS, values[:len(ACCOUNT_COLUMNS)]))
+    stat_values = values[len(ACCOUNT_COLUMNS):len(ACCOUNT_COLUMNS) + len(STAT_COLUMNS)]
+    game_stats = {}
+    for (game, stat), value in zip(STAT_COLUMNS, stat_values):
+        game_stats.setdefault(game, {})[stat] = value
+    record['game_stats'] = game_stats
+    extra = values[-1]
+    if extra:
+        extra = json.loads(extra)
+        for game, stats in extra.pop('game_stats', {}).items():
+            game_stats.setdefault(game, {}).update(stats)
+        record.update(extra)
+    return record